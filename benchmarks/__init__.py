@@ -0,0 +1,15 @@
+"""Benchmarks for the HEMA backend.
+
+Run from the repository root against a local Postgres, e.g.::
+
+    PYTHONPATH=src python -m benchmarks.weekly_generation
+
+``python -m benchmarks.seed`` fills an empty database with a production-sized club
+(10 million visits by default) to run them against.
+
+To compare throughput across commits, save a load test run and pass it as the baseline
+of the next one::
+
+    PYTHONPATH=src python -m benchmarks.loadtest --output before.json
+    PYTHONPATH=src python -m benchmarks.loadtest --baseline before.json
+"""
@@ -0,0 +1,125 @@
+"""Check that the hot service calls work behind a transaction-mode pooler.
+
+PgBouncer in transaction mode may hand each transaction a different server connection,
+so prepared statements and other session state from earlier ones are gone. This stands
+in for it with a ``checkout`` listener that runs ``DISCARD ALL`` every time a connection
+leaves the pool, then runs the hot write path (``materialize``, ``mark_visit``,
+``change_balance``) and the list queries behind the list endpoints for ``--rounds``
+rounds, each in its own checkout. Writes happen in transactions that are rolled back.
+
+It runs once with ``DB_EXTERNAL_POOLER`` on, which must pass, and once with it off,
+which must fail on a missing prepared statement (otherwise the stand-in proves nothing).
+Exits with status 1 on failure.
+"""
+
+import argparse
+import asyncio
+import sys
+import uuid
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from datetime import time as dtime
+
+import sqlalchemy as sa
+from sqlalchemy.exc import DBAPIError
+
+from hema.config import settings
+from hema.db import Database
+from hema.models import TrainerModel, UserModel, WeeklyEventModel
+from hema.services.event import EventService
+from hema.services.intention_service import IntentionService
+from hema.services.payment_service import PaymentService
+from hema.services.visit_service import VisitService
+from hema.services.weekly_event_service import WeeklyEventService
+
+
+def discard_all(dbapi_connection, connection_record, connection_proxy) -> None:
+    # What a transaction-mode pooler amounts to for the client: a server connection with
+    # none of the statements it prepared in earlier transactions
+    driver = dbapi_connection.driver_connection
+    dbapi_connection.await_(driver.execute("DISCARD ALL"))
+
+
+async def writes(database: Database) -> None:
+    today = date.today()
+    async with database.async_session() as session, session.begin() as transaction:
+        user_id, trainer_id = await session.scalars(
+            sa.insert(UserModel)
+            .values(
+                [{"username": f"pooler-{uuid.uuid4().hex[:12]}", "password": "x"} for _ in range(2)]
+            )
+            .returning(UserModel.id)
+        )
+        await session.execute(sa.insert(TrainerModel).values(id=trainer_id))
+        weekly_id = await session.scalar(
+            sa.insert(WeeklyEventModel)
+            .values(
+                start=today,
+                end=today + timedelta(weeks=4),
+                name="Pooler class",
+                weekday=today.weekday(),
+                time_start=dtime(18),
+                time_end=dtime(20),
+                trainer_id=trainer_id,
+                price=10,
+            )
+            .returning(WeeklyEventModel.id)
+        )
+
+        event_id = await EventService(session).materialize(weekly_id, today)
+        await IntentionService(session).create(user_id, event_id)
+        await VisitService(session).mark_visit(user_id, event_id, trainer_id)
+        await PaymentService(session).change_balance(user_id, 10)
+        await WeeklyEventService(session).sync_future_events()
+        await transaction.rollback()
+
+
+async def reads(database: Database) -> None:
+    today = date.today()
+    async with asynccontextmanager(database.get_read_db)() as session:
+        events = EventService(session)
+        await events.list_events(today, today + timedelta(days=6), expand=True, stats=True)
+        await events.list_events_json(today, today + timedelta(days=6), expand=True)
+        await PaymentService(session).list_balances(debtors_only=True)
+        await PaymentService(session).get_user_payment_history(1)
+        await VisitService(session).get_user_visits(1)
+        await WeeklyEventService(session).list_weekly_events()
+
+
+async def run(external_pooler: bool, rounds: int) -> str | None:
+    """Run every round; returns the first error, or ``None``."""
+    # Connection options are read from settings when the engine is created; the stand-in
+    # needs a local pool that reuses connections
+    settings.DB_EXTERNAL_POOLER = external_pooler
+    settings.DB_NULL_POOL = False
+    database = Database(settings.DB_URI)
+    sa.event.listen(database.engine.sync_engine, "checkout", discard_all)
+    try:
+        for _ in range(rounds):
+            await writes(database)
+            await reads(database)
+    except DBAPIError as e:
+        return str(e.orig).splitlines()[0]
+    finally:
+        await database.engine.dispose()
+    return None
+
+
+async def main(rounds: int) -> int:
+    failures = 0
+    for external_pooler, should_pass in ((True, True), (False, False)):
+        error = await run(external_pooler, rounds)
+        if should_pass:
+            status = "ok" if error is None else "FAIL"
+        else:
+            status = "ok" if error and "prepared statement" in error else "FAIL"
+        outcome = "passed" if error is None else f"failed: {error}"
+        print(f"{status:<5} DB_EXTERNAL_POOLER={external_pooler!s:<5} {outcome}")
+        failures += status == "FAIL"
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=3)
+    sys.exit(asyncio.run(main(parser.parse_args().rounds)))
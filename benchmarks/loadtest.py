@@ -0,0 +1,270 @@
+"""Throughput and latency of scripted member and trainer journeys.
+
+Seeds ``--members`` members, ``--trainers`` trainers and one event per iteration
+(all named ``loadtest-*``, removed again afterwards), then runs every user's journey
+``--iterations`` times concurrently against the ASGI app:
+
+- member: login, profile, calendar week (cached and ``stats=true``), sign up for the
+  iteration's event, QR code, balance, visit history
+- trainer: login, calendar week, attendees of the iteration's event, QR check-in
+  (``POST /api/visits``) of its share of the members, debtors list
+
+Each member signs up for and is checked in to a different event on every iteration, so
+repeated runs do the same work. Reports request count, errors, requests per second and
+p50/p95/p99 latency per endpoint; ``--output`` saves them as JSON, ``--baseline``
+compares with such a file from an earlier run. Client and app share one process and
+event loop, so compare runs made on the same machine.
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import time
+from collections import defaultdict
+from datetime import UTC, date, datetime, timedelta
+from datetime import time as dtime
+
+import httpx
+import sqlalchemy as sa
+
+from benchmarks.login_storm import percentile
+from hema.auth import password_hash
+from hema.db import db
+from hema.main import api
+from hema.models import (
+    EventModel,
+    IntentionModel,
+    TrainerModel,
+    UserModel,
+    UserPaymentHistory,
+    VisitModel,
+)
+
+PREFIX = "loadtest-"
+PASSWORD = "loadtest"
+
+
+class Recorder:
+    """Latencies and statuses of every request, keyed by endpoint template."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def request(
+        self, endpoint: str, url: str, headers: dict | None = None, **kwargs
+    ) -> httpx.Response:
+        method = endpoint.split()[0]
+        started = time.perf_counter()
+        response = await self.client.request(method, url, headers=headers, **kwargs)
+        self.samples[endpoint].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[endpoint] += 1
+        return response
+
+    async def login(self, username: str) -> dict:
+        response = await self.request(
+            "POST /api/users/login",
+            "/api/users/login",
+            data={"username": username, "password": PASSWORD},
+        )
+        if response.is_error:
+            return {}
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def week() -> dict:
+    start = date.today() - timedelta(days=date.today().weekday())
+    return {"start": str(start), "end": str(start + timedelta(days=6))}
+
+
+async def member(recorder: Recorder, username: str, events: list[int]) -> None:
+    for event_id in events:
+        headers = await recorder.login(username)
+        await recorder.request("GET /api/users/me", "/api/users/me", headers)
+        await recorder.request("GET /api/events", "/api/events", headers, params=week())
+        await recorder.request(
+            "GET /api/events?stats=true",
+            "/api/events",
+            headers,
+            params={**week(), "stats": "true"},
+        )
+        await recorder.request(
+            "POST /api/intentions", "/api/intentions", headers, json={"event_id": event_id}
+        )
+        await recorder.request("GET /api/users/qr", "/api/users/qr", headers)
+        await recorder.request("GET /api/payments/balance", "/api/payments/balance", headers)
+        await recorder.request("GET /api/visits/me", "/api/visits/me", headers)
+
+
+async def trainer(
+    recorder: Recorder, username: str, events: list[int], member_ids: list[int]
+) -> None:
+    for event_id in events:
+        headers = await recorder.login(username)
+        await recorder.request("GET /api/events", "/api/events", headers, params=week())
+        await recorder.request(
+            "GET /api/intentions/event/{event_id}", f"/api/intentions/event/{event_id}", headers
+        )
+        for user_id in member_ids:
+            # The member's QR code holds {"user_id": ...}; scanning it marks the visit
+            await recorder.request(
+                "POST /api/visits",
+                "/api/visits",
+                headers,
+                json={"user_id": user_id, "event_id": event_id},
+            )
+        await recorder.request(
+            "GET /api/payments/balances?debtors=true",
+            "/api/payments/balances",
+            headers,
+            params={"debtors": "true"},
+        )
+
+
+async def cleanup() -> None:
+    users = sa.select(UserModel.id).where(UserModel.username.startswith(PREFIX))
+    events = sa.select(EventModel.id).where(EventModel.name.startswith(PREFIX))
+    async with db.context() as session:
+        await session.execute(sa.delete(VisitModel).where(VisitModel.event_id.in_(events)))
+        await session.execute(sa.delete(IntentionModel).where(IntentionModel.user_id.in_(users)))
+        await session.execute(
+            sa.delete(UserPaymentHistory).where(UserPaymentHistory.user_id.in_(users))
+        )
+        await session.execute(sa.delete(EventModel).where(EventModel.name.startswith(PREFIX)))
+        await session.execute(sa.delete(TrainerModel).where(TrainerModel.id.in_(users)))
+        await session.execute(sa.delete(UserModel).where(UserModel.username.startswith(PREFIX)))
+
+
+async def seed(members: int, trainers: int, iterations: int) -> tuple[list[int], list[int]]:
+    """Users with one shared password hash (hashing is not what is measured here) and
+    one event per iteration; returns member ids and event ids."""
+    hashed = password_hash.hash(PASSWORD)
+    usernames = [f"{PREFIX}member-{i}" for i in range(members)]
+    usernames += [f"{PREFIX}trainer-{i}" for i in range(trainers)]
+    async with db.context() as session:
+        ids = await session.scalars(
+            sa.insert(UserModel)
+            .values([{"username": name, "password": hashed} for name in usernames])
+            .returning(UserModel.id)
+        )
+        ids = list(ids)
+        trainer_ids = ids[members:]
+        await session.execute(sa.insert(TrainerModel).values([{"id": i} for i in trainer_ids]))
+        event_ids = await session.scalars(
+            sa.insert(EventModel)
+            .values(
+                [
+                    {
+                        "name": f"{PREFIX}{i}",
+                        "date": date.today(),
+                        "time_start": dtime(18, 0),
+                        "time_end": dtime(20, 0),
+                        "trainer_id": trainer_ids[i % trainers],
+                        "price": 10,
+                    }
+                    for i in range(iterations)
+                ]
+            )
+            .returning(EventModel.id)
+        )
+        return ids[:members], list(event_ids)
+
+
+def commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summary(recorder: Recorder, seconds: float) -> dict[str, dict]:
+    return {
+        endpoint: {
+            "requests": len(samples),
+            "errors": recorder.errors[endpoint],
+            "rps": round(len(samples) / seconds, 1),
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+        }
+        for endpoint, samples in sorted(recorder.samples.items())
+    }
+
+
+def report(endpoints: dict[str, dict], baseline: dict[str, dict] | None) -> None:
+    print(f"{'endpoint':<42} {'n':>6} {'err':>4} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for endpoint, row in endpoints.items():
+        line = (
+            f"{endpoint:<42} {row['requests']:>6} {row['errors']:>4} {row['rps']:>8.1f} "
+            f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}"
+        )
+        before = (baseline or {}).get(endpoint)
+        if before:
+            line += f"  p95 {row['p95_ms'] / before['p95_ms'] - 1:+.0%}"
+            line += f" rps {row['rps'] / before['rps'] - 1:+.0%}"
+        print(line)
+
+
+async def run(members: int, trainers: int, iterations: int) -> dict:
+    await cleanup()
+    member_ids, event_ids = await seed(members, trainers, iterations)
+    transport = httpx.ASGITransport(app=api)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            recorder = Recorder(client)
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(member(recorder, f"{PREFIX}member-{i}", event_ids) for i in range(members)),
+                *(
+                    trainer(recorder, f"{PREFIX}trainer-{i}", event_ids, member_ids[i::trainers])
+                    for i in range(trainers)
+                ),
+            )
+            seconds = time.perf_counter() - started
+    finally:
+        await cleanup()
+        await db.engine.dispose()
+
+    endpoints = summary(recorder, seconds)
+    total = sum(row["requests"] for row in endpoints.values())
+    return {
+        "commit": commit(),
+        "started_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "config": {"members": members, "trainers": trainers, "iterations": iterations},
+        "seconds": round(seconds, 3),
+        "requests": total,
+        "rps": round(total / seconds, 1),
+        "endpoints": endpoints,
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    result = asyncio.run(run(args.members, args.trainers, args.iterations))
+    print(
+        f"{result['config']}: {result['requests']} requests in {result['seconds']:.2f}s "
+        f"({result['rps']:.1f} rps, commit {result['commit']})"
+    )
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["endpoints"]
+    report(result["endpoints"], baseline)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=20)
+    parser.add_argument("--trainers", type=int, default=2)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    main(parser.parse_args())
@@ -0,0 +1,82 @@
+"""Latency of unrelated endpoints while many logins hash passwords.
+
+Registers a throwaway user, then fires ``--logins`` concurrent logins at the
+ASGI app while a probe keeps requesting ``--probe`` (``/health`` by default)
+and reports probe latency percentiles. Compare ``PASSWORD_HASH_WORKERS=0``
+(Argon2 inline on the event loop) with the default worker pool.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+import sqlalchemy as sa
+
+from hema.config import settings
+from hema.db import db
+from hema.main import api
+from hema.models import UserModel
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def probe(client: httpx.AsyncClient, path: str, stop: asyncio.Event) -> list[float]:
+    samples = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.005)
+    return samples
+
+
+async def main(logins: int, path: str) -> None:
+    username = f"bench-{uuid.uuid4().hex[:8]}"
+    credentials = {"username": username, "password": "benchmark"}
+    transport = httpx.ASGITransport(app=api)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/api/users/registration", json=credentials)
+        response.raise_for_status()
+        try:
+            stop = asyncio.Event()
+            probing = asyncio.create_task(probe(client, path, stop))
+            await asyncio.sleep(0.2)
+
+            started = time.perf_counter()
+            results = await asyncio.gather(
+                *(client.post("/api/users/login", data=credentials) for _ in range(logins))
+            )
+            storm = time.perf_counter() - started
+
+            stop.set()
+            samples = await probing
+        finally:
+            async with db.context() as session:
+                await session.execute(sa.delete(UserModel).where(UserModel.username == username))
+
+    statuses = statistics.multimode(r.status_code for r in results)
+    print(
+        f"workers={settings.PASSWORD_HASH_WORKERS} executor={settings.PASSWORD_HASH_EXECUTOR} "
+        f"logins={logins} in {storm:.2f}s (status {statuses})"
+    )
+    print(
+        f"{path}: n={len(samples)} p50={percentile(samples, 50):.1f}ms "
+        f"p95={percentile(samples, 95):.1f}ms p99={percentile(samples, 99):.1f}ms "
+        f"max={max(samples):.1f}ms"
+    )
+    await db.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--probe", default="/health")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.probe))
@@ -0,0 +1,191 @@
+"""Fail if a service query plans a sequential scan on a large table.
+
+Seeds realistic volumes inside a transaction that is rolled back afterwards,
+runs each hot service method while recording the SQL it sends, then runs
+``EXPLAIN`` on every recorded statement and walks the plan for ``Seq Scan``
+nodes on the tables listed in ``LARGE_TABLES``. Exits with status 1 on failure.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import sys
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from hema.db import db
+from hema.services.event import EventService
+from hema.services.intention_service import IntentionService
+from hema.services.payment_service import PaymentService
+from hema.services.user_service import UserService
+from hema.services.visit_service import VisitService
+from hema.services.weekly_event_service import WeeklyEventService
+
+LARGE_TABLES = {"events", "visits", "intentions", "payment_history"}
+
+SEED = [
+    "SELECT setseed(0.42)",
+    """
+    INSERT INTO users (username, password)
+    SELECT 'plan_user_' || g, 'x' FROM generate_series(1, :users) g
+    """,
+    "INSERT INTO trainers (id) SELECT id FROM users ORDER BY id LIMIT 10",
+    """
+    INSERT INTO weekly_events (start, "end", name, color, weekday, time_start, time_end, price)
+    SELECT current_date - 365 * 3, current_date + 365, 'Plan class ' || g, '4CAF50', g % 7,
+           '18:00', '20:00', 10
+    FROM generate_series(1, 50) g
+    """,
+    """
+    INSERT INTO events (name, color, date, time_start, time_end, trainer_id, price)
+    SELECT 'Plan event ' || g, '4CAF50', current_date + 90 - g / 6, '18:00', '20:00',
+           (SELECT min(id) FROM trainers) + g % 10, 10
+    FROM generate_series(1, :events) g
+    """,
+    """
+    INSERT INTO visits (user_id, event_id, trainer_id, timestamp, price)
+    SELECT u.id, e.id, e.trainer_id, e.date + e.time_start, 10
+    FROM (
+        SELECT (SELECT min(id) FROM users) + floor(random() * :users)::int AS user_id,
+               (SELECT min(id) FROM events) + floor(random() * :events)::int AS event_id
+        FROM generate_series(1, :visits)
+    ) pairs
+    JOIN users u ON u.id = pairs.user_id
+    JOIN events e ON e.id = pairs.event_id
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO intentions (user_id, event_id)
+    SELECT (SELECT min(id) FROM users) + floor(random() * :users)::int,
+           (SELECT min(id) FROM events) + floor(random() * :events)::int
+    FROM generate_series(1, :intentions)
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO payment_history (user_id, trainer_id, payment, timestamp)
+    SELECT (SELECT min(id) FROM users) + floor(random() * :users)::int,
+           (SELECT min(id) FROM trainers), 50, now() - g * interval '1 hour'
+    FROM generate_series(1, :payments) g
+    """,
+    "ANALYZE users, trainers, weekly_events, events, visits, intentions, payment_history",
+]
+
+
+def cases(user_id: int, event_id: int, username: str) -> dict[str, Callable]:
+    today = date.today()
+    cursor = (datetime.now() - timedelta(days=30), 2**31 - 1)
+    return {
+        "EventService.list_events": lambda s: EventService(s).list_events(
+            today - timedelta(days=14), today + timedelta(days=14)
+        ),
+        "EventService.list_events(expand)": lambda s: EventService(s).list_events(
+            today - timedelta(days=14), today + timedelta(days=14), expand=True
+        ),
+        "EventService.list_events(stats)": lambda s: EventService(s).list_events(
+            today - timedelta(days=14), today + timedelta(days=14), stats=True, user_id=user_id
+        ),
+        "EventService.by_id": lambda s: EventService(s).by_id(event_id),
+        "VisitService.get_user_visits": lambda s: VisitService(s).get_user_visits(user_id),
+        "VisitService.get_user_visits(cursor)": lambda s: VisitService(s).get_user_visits(
+            user_id, after=cursor
+        ),
+        "IntentionService.get_for_event": lambda s: IntentionService(s).get_for_event(event_id),
+        "IntentionService.has_intention": lambda s: IntentionService(s).has_intention(
+            user_id, event_id
+        ),
+        "PaymentService.get_user_balance": lambda s: PaymentService(s).get_user_balance(user_id),
+        "PaymentService.get_user_payment_history": lambda s: PaymentService(
+            s
+        ).get_user_payment_history(user_id),
+        "PaymentService.get_user_payment_history(cursor)": lambda s: PaymentService(
+            s
+        ).get_user_payment_history(user_id, after=cursor),
+        "UserService.get_by_id": lambda s: UserService(s).get_by_id(user_id),
+        "UserService.get_by_username": lambda s: UserService(s).get_by_username(username),
+        "WeeklyEventService.sync_future_events": lambda s: WeeklyEventService(
+            s
+        ).sync_future_events(),
+    }
+
+
+@contextlib.contextmanager
+def recording(statements: list):
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    sa.event.listen(db.engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield
+    finally:
+        sa.event.remove(db.engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in LARGE_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", ()):
+        found.extend(seq_scans(child))
+    return found
+
+
+async def check(session: AsyncSession, name: str, call: Callable[..., Awaitable]) -> list[str]:
+    statements: list = []
+    with recording(statements):
+        await call(session)
+
+    problems = []
+    conn = await session.connection()
+    for statement, parameters in statements:
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = result.scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        problems += [
+            f"Seq Scan on {table}: {' '.join(statement.split())[:120]}"
+            for table in seq_scans(plan[0]["Plan"])
+        ]
+    status = "FAIL" if problems else "ok"
+    print(f"{status:<5} {name} ({len(statements)} statements)")
+    for problem in problems:
+        print(f"      {problem}")
+    return problems
+
+
+async def main(volumes: dict[str, int]) -> int:
+    failures = 0
+    async with db.async_session() as session:
+        transaction = await session.begin()
+        for statement in SEED:
+            params = {k: v for k, v in volumes.items() if f":{k}" in statement}
+            await session.execute(sa.text(statement), params)
+
+        user_id, username = (
+            await session.execute(
+                sa.text("SELECT user_id, username FROM visits JOIN users ON users.id = user_id")
+            )
+        ).first()
+        event_id = await session.scalar(
+            sa.text("SELECT event_id FROM intentions WHERE event_id IS NOT NULL LIMIT 1")
+        )
+
+        for name, call in cases(user_id, event_id, username).items():
+            failures += bool(await check(session, name, call))
+
+        await transaction.rollback()
+
+    await db.engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--visits", type=int, default=300_000)
+    parser.add_argument("--intentions", type=int, default=200_000)
+    parser.add_argument("--payments", type=int, default=50_000)
+    sys.exit(asyncio.run(main(vars(parser.parse_args()))))
@@ -0,0 +1,190 @@
+"""Check that reads go round-robin to replicas and fall back to the primary.
+
+Builds ``hema.db.Database`` objects for ``--primary`` and ``--replica`` (a streaming
+standby of it) and checks that
+
+* reads alternate between two replica entries while both are fresh,
+* an unreachable replica (``--unreachable``) is skipped, and the primary serves reads
+  when no replica is left,
+* a replica that accepts connections but never answers (a local socket standing in for a
+  black-holed host) is skipped within ``Database(replica_timeout=...)``,
+* a replica whose replay is paused (``pg_wal_replay_pause``, needs a superuser) is
+  skipped once it trails by more than ``--max-lag`` seconds, and is used again after
+  replay resumes.
+
+Writes nothing but empty transactions on the primary. Exits with status 1 on failure.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from contextlib import asynccontextmanager
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from hema.config import settings
+from hema.db import Database
+
+
+async def served_by(database: Database) -> str:
+    """Name (as in ``Database.engines``) of the engine that served one read."""
+    names = {engine.pool: name for name, engine in database.engines.items()}
+    async with asynccontextmanager(database.get_read_db)() as session:
+        await session.execute(sa.text("SELECT 1"))
+        return names[session.bind.pool]
+
+
+async def commit_on_primary(database: Database) -> None:
+    # Assigning a transaction id makes the commit a WAL record the replica has to replay
+    async with database.engine.begin() as connection:
+        await connection.execute(sa.text("SELECT pg_current_xact_id()"))
+
+
+async def set_replay(engine: AsyncEngine, paused: bool) -> None:
+    function = "pg_wal_replay_pause" if paused else "pg_wal_replay_resume"
+    async with engine.begin() as connection:
+        await connection.execute(sa.text(f"SELECT {function}()"))
+
+
+async def dispose(database: Database) -> None:
+    for engine in database.engines.values():
+        await engine.dispose()
+
+
+async def round_robin(primary: str, replica: str, unreachable: str, max_lag: float) -> list:
+    database = Database(primary, [replica, replica], max_lag=max_lag, check_interval=0)
+    try:
+        served = [await served_by(database) for _ in range(4)]
+    finally:
+        await dispose(database)
+    if served != ["replica1", "replica2", "replica1", "replica2"]:
+        return [f"reads served by {served}"]
+    return []
+
+
+async def unreachable_replica(primary: str, replica: str, unreachable: str, max_lag: float):
+    problems = []
+    database = Database(primary, [unreachable, replica], max_lag=max_lag, check_interval=0)
+    try:
+        served = [await served_by(database) for _ in range(3)]
+        if served != ["replica2"] * 3:
+            problems.append(f"with one replica down, reads served by {served}")
+        if database.replicas[0].available:
+            problems.append("unreachable replica not marked unavailable")
+    finally:
+        await dispose(database)
+
+    database = Database(primary, [unreachable], max_lag=max_lag, check_interval=0)
+    try:
+        served = await served_by(database)
+        if served != "primary":
+            problems.append(f"with every replica down, read served by {served}")
+    finally:
+        await dispose(database)
+    return problems
+
+
+async def unresponsive_replica(primary: str, replica: str, unreachable: str, max_lag: float):
+    held = []
+
+    async def accept(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        held.append(writer)
+
+    server = await asyncio.start_server(accept, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    silent = sa.make_url(replica).set(host="127.0.0.1", port=port)
+    timeout = 0.5
+    database = Database(
+        primary,
+        [silent.render_as_string(hide_password=False)],
+        max_lag=max_lag,
+        check_interval=0,
+        replica_timeout=timeout,
+    )
+    problems = []
+    try:
+        started = time.monotonic()
+        served = await served_by(database)
+        seconds = time.monotonic() - started
+        if served != "primary":
+            problems.append(f"read served by {served}")
+        if seconds > timeout + 1:
+            problems.append(f"read took {seconds:.1f}s with a {timeout}s replica timeout")
+    finally:
+        await dispose(database)
+        for writer in held:
+            writer.close()
+        server.close()
+    return problems
+
+
+async def lagging_replica(primary: str, replica: str, unreachable: str, max_lag: float):
+    problems = []
+    database = Database(primary, [replica], max_lag=max_lag, check_interval=0)
+    standby = database.replicas[0]
+    try:
+        if (served := await served_by(database)) != "replica1":
+            problems.append(f"fresh replica not used, read served by {served}")
+
+        await set_replay(standby.engine, paused=True)
+        try:
+            await commit_on_primary(database)
+            await asyncio.sleep(max_lag + 0.5)
+            served = await served_by(database)
+            if served != "primary":
+                problems.append(f"replica {standby.lag:.1f}s behind served a read")
+        finally:
+            await set_replay(standby.engine, paused=False)
+
+        deadline = time.monotonic() + max_lag + 5
+        while (served := await served_by(database)) != "replica1":
+            if time.monotonic() > deadline:
+                problems.append(f"replica not used again after catching up ({standby.lag}s)")
+                break
+            await asyncio.sleep(0.1)
+    finally:
+        await dispose(database)
+    return problems
+
+
+CHECKS = {
+    "round-robin over fresh replicas": round_robin,
+    "unreachable replica skipped": unreachable_replica,
+    "unresponsive replica skipped": unresponsive_replica,
+    "lagging replica skipped": lagging_replica,
+}
+
+
+async def main(primary: str, replica: str, unreachable: str, max_lag: float) -> int:
+    failures = 0
+    for name, check in CHECKS.items():
+        problems = await check(primary, replica, unreachable, max_lag)
+        print(f"{'FAIL' if problems else 'ok':<5} {name}")
+        for problem in problems:
+            print(f"      {problem}")
+        failures += bool(problems)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--primary", default=settings.DB_URI)
+    parser.add_argument(
+        "--replica",
+        default=next(iter(settings.DB_REPLICA_URIS), None),
+        help="streaming standby of the primary (default: the first of DB_REPLICA_URIS)",
+    )
+    parser.add_argument(
+        "--unreachable",
+        help="DSN nothing listens on (default: the primary's, on 127.0.0.1 port 1)",
+    )
+    parser.add_argument("--max-lag", type=float, default=1.0)
+    args = parser.parse_args()
+    if args.replica is None:
+        parser.error("--replica is required when DB_REPLICA_URIS is empty")
+    unreachable = args.unreachable or sa.make_url(args.primary).set(
+        host="127.0.0.1", port=1
+    ).render_as_string(hide_password=False)
+    sys.exit(asyncio.run(main(args.primary, args.replica, unreachable, args.max_lag)))
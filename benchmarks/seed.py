@@ -0,0 +1,436 @@
+"""Deterministic club-sized dataset, bulk-loaded with COPY.
+
+Replaces all data in the ``DB_URI`` database (pass ``--replace`` if it is not empty)
+with ``--members`` members, the first ``--trainers`` of them trainers, and
+``--templates`` weekly templates materialized into events from ``--years`` back up to
+``EVENTS_HORIZON_WEEKS`` ahead. Past events get about ``--visits`` visits, a share of
+which were signed up for; upcoming events get sign-ups only. Members top up their
+balance in payment_history to roughly cover their visits, and the balances ledger is
+rebuilt at the end. The same ``--seed`` and sizes give the same rows on a given day
+(dates count back from today; only the password salt differs).
+
+Skew:
+
+- ``--popularity``: Zipf exponent of template popularity, i.e. attendance per event
+- ``--activity``: lognormal sigma of how often individual members come
+- ``--inactive``: share of members who stopped coming at some point
+- ``--debtors``: share of members who pay for only part of their visits
+
+Everyone's password is ``PASSWORD``, usernames are ``trainer<n>`` and ``member<n>``.
+Secondary indexes and foreign keys of the large tables are dropped for the load and
+re-created afterwards.
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import sys
+import time
+from array import array
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from datetime import time as dtime
+
+import asyncpg
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from hema.auth import password_hash
+from hema.config import settings
+from hema.db import db
+from hema.models import (
+    EventModel,
+    IntentionModel,
+    TrainerModel,
+    UserBalanceModel,
+    UserModel,
+    UserPaymentHistory,
+    VisitModel,
+    WeeklyEventModel,
+)
+from hema.notify import driver_dsn
+from hema.schemas.users import UserGender
+from hema.services.payment_service import PaymentService
+
+PASSWORD = "password"
+
+TABLES = (
+    UserModel,
+    TrainerModel,
+    WeeklyEventModel,
+    EventModel,
+    VisitModel,
+    IntentionModel,
+    UserPaymentHistory,
+    UserBalanceModel,
+)
+# Secondary indexes and foreign keys of these are only re-created after the load
+LARGE_TABLES = (VisitModel, IntentionModel, UserPaymentHistory)
+
+DISCIPLINES = ("Longsword", "Sabre", "Rapier", "Messer", "Sword and buckler", "Sparring")
+COLORS = ("4CAF50", "2196F3", "F44336", "FF9800", "9C27B0", "607D8B")
+PRICES = (0, 10, 10, 15, 20)
+TOP_UPS = (50, 100, 100, 200)
+# Share of the active members that attend the most popular classes at most
+FULL_CLASS = 0.5
+
+
+@dataclass
+class Member:
+    id: int
+    joined: date
+    left: date
+    weight: float
+    debtor: bool
+
+
+@dataclass
+class Event:
+    id: int
+    date: date
+    time_start: dtime
+    trainer_id: int
+    price: int
+    weight: float
+
+
+class Pools:
+    """Members active in each month, with cumulative weights for ``random.choices``."""
+
+    def __init__(self, members: list[Member]):
+        self.members = members
+        self._pools: dict[tuple[int, int], tuple[list[int], list[float]]] = {}
+
+    def get(self, day: date) -> tuple[list[int], list[float]]:
+        key = (day.year, day.month)
+        if key not in self._pools:
+            month = day.replace(day=1)
+            active = [
+                m
+                for m in self.members
+                if m.joined <= month + timedelta(days=27) and m.left >= month
+            ]
+            self._pools[key] = (
+                [m.id for m in active],
+                list(itertools.accumulate(m.weight for m in active)),
+            )
+        return self._pools[key]
+
+    @staticmethod
+    def draw(rng: random.Random, pool: tuple[list[int], list[float]], k: int) -> list[int]:
+        """Up to ``k`` distinct members; heavy skew can leave fewer than ``k``."""
+        ids, weights = pool
+        k = min(k, len(ids))
+        chosen: set[int] = set()
+        for _ in range(10):
+            if len(chosen) >= k:
+                break
+            chosen.update(rng.choices(ids, cum_weights=weights, k=k - len(chosen)))
+        return sorted(chosen)
+
+
+def members(rng: random.Random, args: argparse.Namespace, first: date) -> list[Member]:
+    today = date.today()
+    days = (today - first).days
+    result = []
+    for user_id in range(1, args.members + 1):
+        # The club grew over the years, so later joins are more common
+        joined = first + timedelta(days=int(days * rng.random() ** 0.5))
+        left = date.max
+        if rng.random() < args.inactive:
+            left = joined + timedelta(days=rng.randrange(max((today - joined).days, 1)))
+        weight = rng.lognormvariate(0, args.activity)
+        result.append(Member(user_id, joined, left, weight, rng.random() < args.debtors))
+    return result
+
+
+def templates(rng: random.Random, args: argparse.Namespace, first: date, horizon: date):
+    trainer_ids = range(1, args.trainers + 1)
+    ranks = rng.sample(range(1, args.templates + 1), args.templates)
+    days = (horizon - first).days
+    for template_id, rank in zip(range(1, args.templates + 1), ranks, strict=True):
+        start = first + timedelta(days=rng.randrange(days))
+        # About half are still running, the rest were retired after a while
+        end = horizon if rng.random() < 0.5 else start + timedelta(days=rng.randrange(90, days))
+        hour = rng.choice((17, 18, 19, 20))
+        yield {
+            "id": template_id,
+            "start": start,
+            "end": min(end, horizon),
+            "name": f"{rng.choice(DISCIPLINES)} {template_id}",
+            "color": rng.choice(COLORS),
+            "weekday": rng.randrange(7),
+            "time_start": dtime(hour, 0),
+            "time_end": dtime(hour + rng.choice((1, 2)), 0),
+            "trainer_id": rng.choice(trainer_ids),
+            "price": rng.choice(PRICES),
+            "weight": 1 / rank**args.popularity,
+        }
+
+
+def occurrences(template: dict) -> Iterator[date]:
+    day = template["start"] + timedelta(
+        days=(template["weekday"] - template["start"].weekday()) % 7
+    )
+    while day <= template["end"]:
+        yield day
+        day += timedelta(weeks=1)
+
+
+class Generator:
+    """Rows of the visits, intentions and payment_history tables.
+
+    Visits are produced lazily for COPY; charges and sign-ups are collected on the way
+    for the payments and intentions that follow.
+    """
+
+    def __init__(self, rng: random.Random, args: argparse.Namespace, members: list[Member]):
+        self.rng = rng
+        self.args = args
+        self.members = members
+        self.pools = Pools(members)
+        self.charges = [0] * (len(members) + 1)
+        self.intention_users = array("i")
+        self.intention_events = array("i")
+        # Visitors per unit of template popularity and active member
+        self.scale = 0.0
+
+    def attendance(self, events: list[Event]) -> Iterator[tuple[Event, int]]:
+        """Visitors per past event, proportional to its template's popularity and to the
+        number of members at the time. Events are capped at ``FULL_CLASS`` of the members,
+        and what the capped ones cannot take is spread over the others."""
+        today = date.today()
+        past = [e for e in events if e.date < today]
+        sizes = [len(self.pools.get(e.date)[0]) for e in past]
+        weights = [e.weight * size for e, size in zip(past, sizes, strict=True)]
+        caps = [FULL_CLASS * size for size in sizes]
+        capped: list[bool] = []
+        self.scale = self.args.visits / (sum(weights) or 1)
+        while True:
+            full = [w * self.scale >= cap for w, cap in zip(weights, caps, strict=True)]
+            free = sum(w for w, f in zip(weights, full, strict=True) if not f)
+            if full == capped or not free:
+                break
+            capped = full
+            taken = sum(cap for cap, f in zip(caps, full, strict=True) if f)
+            self.scale = max(self.args.visits - taken, 0) / free
+        for event, weight, cap in zip(past, weights, caps, strict=True):
+            yield event, int(min(weight * self.scale, cap) + self.rng.random())
+
+    def visits(self, events: list[Event]) -> Iterator[tuple]:
+        rng = self.rng
+        rate = self.args.intention_rate
+        for event, count in self.attendance(events):
+            at = datetime.combine(event.date, event.time_start)
+            for user_id in Pools.draw(rng, self.pools.get(event.date), count):
+                self.charges[user_id] += event.price
+                if rng.random() < rate:
+                    self.intention_users.append(user_id)
+                    self.intention_events.append(event.id)
+                yield user_id, event.id, event.trainer_id, at, event.price
+
+    def intentions(self, events: list[Event]) -> Iterator[tuple]:
+        """Sign-ups of past visits, then of upcoming events at the same rate (run after
+        ``visits``)."""
+        yield from zip(self.intention_users, self.intention_events, strict=True)
+        today = date.today()
+        pool = self.pools.get(today)
+        scale = self.scale * self.args.intention_rate * len(pool[0])
+        for event in events:
+            if event.date >= today:
+                count = int(
+                    min(event.weight * scale, FULL_CLASS * len(pool[0])) + self.rng.random()
+                )
+                for user_id in Pools.draw(self.rng, pool, count):
+                    yield user_id, event.id
+
+    def payments(self) -> Iterator[tuple]:
+        rng = self.rng
+        today = datetime.combine(date.today(), dtime())
+        for member in self.members:
+            owed = self.charges[member.id]
+            if not owed:
+                continue
+            target = owed * (rng.uniform(0.5, 0.9) if member.debtor else rng.uniform(1, 1.1))
+            start = datetime.combine(member.joined, dtime(12, 0))
+            end = min(today, datetime.combine(member.left, dtime(12, 0)))
+            span = max((end - start).total_seconds(), 1)
+            paid, amounts = 0, []
+            while paid < target:
+                amounts.append(rng.choice(TOP_UPS))
+                paid += amounts[-1]
+            offsets = sorted(rng.random() * span for _ in amounts)
+            trainer_id = rng.randrange(1, self.args.trainers + 1)
+            for amount, offset in zip(amounts, offsets, strict=True):
+                yield member.id, trainer_id, amount, start + timedelta(seconds=offset)
+
+
+async def copy(
+    connection: asyncpg.Connection, model, columns: tuple[str, ...], records: Iterable[tuple]
+) -> None:
+    started = time.perf_counter()
+    status = await connection.copy_records_to_table(
+        model.__tablename__, records=records, columns=columns
+    )
+    rows = int(status.split()[-1])
+    print(f"{model.__tablename__:<16} {rows:>11,} rows {time.perf_counter() - started:7.1f}s")
+
+
+async def load(connection: asyncpg.Connection, args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    today = date.today()
+    first = today - timedelta(days=round(365.25 * args.years))
+    horizon = today + timedelta(weeks=settings.EVENTS_HORIZON_WEEKS)
+
+    club = members(rng, args, first)
+    hashed = password_hash.hash(PASSWORD)
+    genders = [g.value for g in UserGender]
+    await copy(
+        connection,
+        UserModel,
+        ("id", "username", "name", "password", "gender"),
+        (
+            (
+                m.id,
+                f"trainer{m.id}" if m.id <= args.trainers else f"member{m.id}",
+                f"Member {m.id}",
+                hashed,
+                rng.choice(genders),
+            )
+            for m in club
+        ),
+    )
+    await copy(connection, TrainerModel, ("id",), ((i,) for i in range(1, args.trainers + 1)))
+
+    weekly = list(templates(rng, args, first, horizon))
+    columns = ("id", "start", "end", "name", "color", "weekday", "time_start", "time_end")
+    columns += ("trainer_id", "price")
+    await copy(
+        connection, WeeklyEventModel, columns, (tuple(t[c] for c in columns) for t in weekly)
+    )
+
+    events: list[Event] = []
+    event_rows = []
+    for template in weekly:
+        for day in occurrences(template):
+            event = Event(
+                len(events) + 1,
+                day,
+                template["time_start"],
+                template["trainer_id"],
+                template["price"],
+                template["weight"],
+            )
+            events.append(event)
+            event_rows.append(
+                (
+                    event.id,
+                    template["name"],
+                    template["color"],
+                    day,
+                    template["time_start"],
+                    template["time_end"],
+                    template["id"],
+                    event.trainer_id,
+                    event.price,
+                )
+            )
+    columns = ("id", "name", "color", "date", "time_start", "time_end", "weekly_id")
+    await copy(connection, EventModel, (*columns, "trainer_id", "price"), event_rows)
+
+    generator = Generator(rng, args, club)
+    await copy(
+        connection,
+        VisitModel,
+        ("user_id", "event_id", "trainer_id", "timestamp", "price"),
+        generator.visits(events),
+    )
+    await copy(connection, IntentionModel, ("user_id", "event_id"), generator.intentions(events))
+    await copy(
+        connection,
+        UserPaymentHistory,
+        ("user_id", "trainer_id", "payment", "timestamp"),
+        generator.payments(),
+    )
+
+    # Explicit ids were copied, so move the sequences past them
+    for model in (UserModel, WeeklyEventModel, EventModel):
+        table = model.__tablename__
+        await connection.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), max(id)) FROM {table}"
+        )
+
+
+async def deferred_ddl(connection: asyncpg.Connection, model) -> tuple[list[str], list[str]]:
+    """Statements dropping the table's secondary indexes and foreign keys, and the ones
+    re-creating them: one index build and one join per key instead of work per row."""
+    table = model.__tablename__
+    dialect = postgresql.dialect()
+    indexes = model.__table__.indexes
+    drop = [f'DROP INDEX IF EXISTS "{index.name}"' for index in indexes]
+    create = [str(sa.schema.CreateIndex(index).compile(dialect=dialect)) for index in indexes]
+    # Foreign keys carry the names Postgres gave them, so read them from the catalog
+    foreign_keys = await connection.fetch(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint"
+        " WHERE conrelid = $1::regclass AND contype = 'f'",
+        table,
+    )
+    for name, definition in foreign_keys:
+        drop.append(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+        create.append(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+    return drop, create
+
+
+async def main(args: argparse.Namespace) -> int:
+    connection = await asyncpg.connect(driver_dsn(settings.DB_URI))
+    try:
+        if await connection.fetchval("SELECT EXISTS (SELECT FROM users)") and not args.replace:
+            print("The database already has users; pass --replace to delete all data first")
+            return 1
+
+        started = time.perf_counter()
+        async with connection.transaction():
+            tables = ", ".join(model.__tablename__ for model in TABLES)
+            await connection.execute(f"TRUNCATE {tables} RESTART IDENTITY CASCADE")
+            await connection.execute("SET LOCAL maintenance_work_mem = '512MB'")
+            ddl = [await deferred_ddl(connection, model) for model in LARGE_TABLES]
+            for drop, _ in ddl:
+                for statement in drop:
+                    await connection.execute(statement)
+
+            await load(connection, args)
+
+            indexing = time.perf_counter()
+            for _, create in ddl:
+                for statement in create:
+                    await connection.execute(statement)
+            print(f"{'indexes, keys':<16} {'':>16} {time.perf_counter() - indexing:7.1f}s")
+
+        async with db.context() as session:
+            balances = await PaymentService(session).reconcile_balances()
+        print(f"{'balances':<16} {balances:>11,} rows")
+        await connection.execute("ANALYZE")
+        print(f"{'total':<16} {'':>16} {time.perf_counter() - started:7.1f}s")
+    finally:
+        await connection.close()
+        await db.engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--members", type=int, default=5_000)
+    parser.add_argument("--trainers", type=int, default=20)
+    parser.add_argument("--templates", type=int, default=200)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--visits", type=int, default=10_000_000)
+    parser.add_argument("--intention-rate", type=float, default=0.3)
+    parser.add_argument("--popularity", type=float, default=1.0)
+    parser.add_argument("--activity", type=float, default=1.0)
+    parser.add_argument("--inactive", type=float, default=0.4)
+    parser.add_argument("--debtors", type=float, default=0.1)
+    parser.add_argument("--replace", action="store_true", help="delete existing data first")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,80 @@
+"""Cost of turning event rows into a JSON response body.
+
+``before`` mirrors the old path: ``model_validate`` per row in the service, then
+FastAPI's ``response_model`` handling validates the list again, dumps it to JSON-able
+Python and encodes it with ``json.dumps`` (as ``JSONResponse`` does). ``after`` validates
+all rows in one ``TypeAdapter`` call and serializes the list straight to JSON bytes
+(``hema.responses.json_response``). No database is needed.
+"""
+
+import argparse
+import json
+import time
+from datetime import date, timedelta
+from datetime import time as dtime
+
+from pydantic import TypeAdapter
+
+from hema.responses import adapter
+from hema.schemas.events import EventResponse
+
+EVENT_LIST = list[EventResponse]
+
+
+def rows(count: int) -> list[dict]:
+    start = date(2026, 1, 5)
+    return [
+        {
+            "id": i,
+            "name": f"Longsword {i % 7}",
+            "color": "4CAF50",
+            "date": start + timedelta(days=i // 4),
+            "time_start": dtime(18, 0),
+            "time_end": dtime(20, 0),
+            "weekly_id": i % 50 or None,
+            "trainer_id": i % 10,
+            "price": 10,
+            "trainer_name": f"Trainer {i % 10}",
+        }
+        for i in range(count)
+    ]
+
+
+def before(data: list[dict]) -> bytes:
+    events = [EventResponse.model_validate(row) for row in data]
+    field = TypeAdapter(EVENT_LIST)
+    validated = field.validate_python(events, from_attributes=True)
+    content = field.dump_python(validated, mode="json")
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode()
+
+
+def after(data: list[dict]) -> bytes:
+    events = adapter(EVENT_LIST).validate_python(data)
+    return adapter(EVENT_LIST).dump_json(events)
+
+
+def best_of(func, data, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main(sizes: list[int], repeat: int) -> None:
+    for size in sizes:
+        data = rows(size)
+        assert json.loads(before(data)) == json.loads(after(data))
+        old, new = best_of(before, data, repeat), best_of(after, data, repeat)
+        print(f"{size:>6} events: before {old:8.2f}ms  after {new:8.2f}ms  ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.sizes, args.repeat)
@@ -0,0 +1,88 @@
+"""Compare per-template and set-based generation of recurring events.
+
+Inserts ``--templates`` weekly templates spanning ``--years`` years inside a
+transaction that is rolled back afterwards, then times generating them up to the
+events horizon (``EVENTS_HORIZON_WEEKS``):
+
+* ``loop``: ``generate_events`` called once per template (Python date stepping)
+* ``set``: a single ``generate_all_events`` statement
+* ``set (noop)``: ``generate_all_events`` again when every event already exists
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+from datetime import time as dtime
+
+import sqlalchemy as sa
+
+from hema.db import db
+from hema.models import WeeklyEventModel
+from hema.services.weekly_event_service import WeeklyEventService, events_horizon
+
+
+def templates(count: int, years: int, rnd: random.Random) -> list[dict]:
+    today = date.today()
+    rows = []
+    for i in range(count):
+        start = today - timedelta(days=rnd.randint(0, 365))
+        hour = rnd.randint(8, 20)
+        rows.append(
+            {
+                "name": f"Bench class {i}",
+                "color": "4CAF50",
+                "start": start,
+                "end": today + timedelta(days=365 * years),
+                "weekday": rnd.randint(0, 6),
+                "time_start": dtime(hour, 0),
+                "time_end": dtime(hour + 1, 30),
+                "price": rnd.choice((0, 10, 15, 20)),
+            }
+        )
+    return rows
+
+
+async def timed(label: str, coro) -> None:
+    started = time.perf_counter()
+    created = await coro
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12} {elapsed * 1000:10.1f} ms  {created:>8} events")
+
+
+async def main(count: int, years: int, seed: int) -> None:
+    rows = templates(count, years, random.Random(seed))
+
+    async with db.async_session() as session:
+        transaction = await session.begin()
+        ids = list(
+            await session.scalars(sa.insert(WeeklyEventModel).returning(WeeklyEventModel.id), rows)
+        )
+        service = WeeklyEventService(session)
+        horizon = events_horizon()
+
+        async with session.begin_nested() as savepoint:
+
+            async def loop() -> int:
+                return sum([await service.generate_events(i, horizon) for i in ids])
+
+            await timed("loop", loop())
+            await savepoint.rollback()
+
+        async with session.begin_nested():
+            await timed("set", service.generate_all_events(ids, horizon))
+            await timed("set (noop)", service.generate_all_events(ids, horizon))
+
+        await transaction.rollback()
+
+    await db.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--templates", type=int, default=500)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(main(args.templates, args.years, args.seed))
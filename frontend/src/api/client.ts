@@ -8,10 +8,7 @@ class ApiError extends Error {
   }
 }
 
-async function request<T>(
-  path: string,
-  options: RequestInit = {},
-): Promise<T> {
+async function send(path: string, options: RequestInit = {}): Promise<Response> {
   const token = localStorage.getItem('token');
   const headers: Record<string, string> = {
     'Content-Type': 'application/json',
@@ -39,6 +36,15 @@ async function request<T>(
     throw new ApiError(response.status, message);
   }
 
+  return response;
+}
+
+async function request<T>(
+  path: string,
+  options: RequestInit = {},
+): Promise<T> {
+  const response = await send(path, options);
+
   if (response.status === 204) {
     return undefined as T;
   }
@@ -50,6 +56,19 @@ export function get<T>(path: string): Promise<T> {
   return request<T>(path);
 }
 
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+export async function getPage<T>(path: string): Promise<Page<T>> {
+  const response = await send(path);
+  return {
+    items: await response.json(),
+    nextCursor: response.headers.get('X-Next-Cursor'),
+  };
+}
+
 export function post<T>(path: string, body?: unknown): Promise<T> {
   return request<T>(path, {
     method: 'POST',
@@ -1,6 +1,11 @@
 import type { Visit } from '../types';
-import { get } from './client';
+import { getPage, type Page } from './client';
 
-export async function getMyHistory(limit = 50, offset = 0): Promise<Visit[]> {
-  return get<Visit[]>(`/visits/me?limit=${limit}&offset=${offset}`);
+export async function getMyHistory(
+  limit = 50,
+  cursor: string | null = null,
+): Promise<Page<Visit>> {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) params.set('cursor', cursor);
+  return getPage<Visit>(`/visits/me?${params}`);
 }
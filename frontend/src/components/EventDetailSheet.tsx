@@ -21,6 +21,7 @@ interface EventDetailSheetProps {
   open: boolean;
   onClose: () => void;
   onOpen: () => void;
+  onSignUpChange?: (eventId: number, signed: boolean) => void;
 }
 
 function formatDateTime(dateStr: string, timeStr: string): string {
@@ -35,7 +36,13 @@ function formatDateTime(dateStr: string, timeStr: string): string {
   });
 }
 
-export default function EventDetailSheet({ event, open, onClose, onOpen }: EventDetailSheetProps) {
+export default function EventDetailSheet({
+  event,
+  open,
+  onClose,
+  onOpen,
+  onSignUpChange,
+}: EventDetailSheetProps) {
   const [refreshKey, setRefreshKey] = useState(0);
   const { user } = useAuth();
   const navigate = useNavigate();
@@ -112,7 +119,14 @@ export default function EventDetailSheet({ event, open, onClose, onOpen }: Event
         </Button>
       )}
 
-      <SignUpButton eventId={event.id} onToggle={() => setRefreshKey((k) => k + 1)} />
+      <SignUpButton
+        eventId={event.id}
+        signedUp={event.my_intention}
+        onToggle={(signed) => {
+          setRefreshKey((k) => k + 1);
+          onSignUpChange?.(event.id, signed);
+        }}
+      />
 
       <AttendeeList eventId={event.id} refreshKey={refreshKey} />
     </SwipeableDrawer>
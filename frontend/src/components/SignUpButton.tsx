@@ -5,10 +5,11 @@ import { useAuth } from '../contexts/AuthContext';
 
 interface SignUpButtonProps {
   eventId: number;
-  onToggle: () => void;
+  signedUp?: boolean | null;
+  onToggle: (signed: boolean) => void;
 }
 
-export default function SignUpButton({ eventId, onToggle }: SignUpButtonProps) {
+export default function SignUpButton({ eventId, signedUp, onToggle }: SignUpButtonProps) {
   const { isAuthenticated } = useAuth();
   const [signed, setSigned] = useState(false);
   const [loading, setLoading] = useState(true);
@@ -18,10 +19,16 @@ export default function SignUpButton({ eventId, onToggle }: SignUpButtonProps) {
       setLoading(false);
       return;
     }
+    // The calendar already loaded the flag along with the events
+    if (signedUp != null) {
+      setSigned(signedUp);
+      setLoading(false);
+      return;
+    }
     hasIntention(eventId)
       .then(setSigned)
       .finally(() => setLoading(false));
-  }, [eventId, isAuthenticated]);
+  }, [eventId, isAuthenticated, signedUp]);
 
   const handleClick = async () => {
     setLoading(true);
@@ -33,7 +40,7 @@ export default function SignUpButton({ eventId, onToggle }: SignUpButtonProps) {
         await signUp(eventId);
         setSigned(true);
       }
-      onToggle();
+      onToggle(!signed);
     } catch {
       // ignore
     } finally {
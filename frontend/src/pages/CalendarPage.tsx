@@ -57,7 +57,7 @@ export default function CalendarPage() {
   const fetchData = useCallback(async () => {
     setLoading(true);
     try {
-      const evts = await get<Event[]>(`/events?start=${mondayStr}&end=${sundayStr}`);
+      const evts = await get<Event[]>(`/events?start=${mondayStr}&end=${sundayStr}&stats=true`);
       setEvents(evts);
     } catch {
       // ignore
@@ -66,6 +66,19 @@ export default function CalendarPage() {
     }
   }, [mondayStr]);
 
+  const handleSignUpChange = (eventId: number, signed: boolean) => {
+    const patch = (e: Event) =>
+      e.id === eventId
+        ? {
+            ...e,
+            my_intention: signed,
+            intention_count: (e.intention_count ?? 0) + (signed ? 1 : -1),
+          }
+        : e;
+    setEvents((evts) => evts.map(patch));
+    setSelectedEvent((e) => e && patch(e));
+  };
+
   useEffect(() => {
     fetchData();
   }, [fetchData]);
@@ -129,6 +142,7 @@ export default function CalendarPage() {
         open={sheetOpen}
         onClose={() => setSheetOpen(false)}
         onOpen={() => setSheetOpen(true)}
+        onSignUpChange={handleSignUpChange}
       />
 
       <CreateEventDialog
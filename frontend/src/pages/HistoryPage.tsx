@@ -19,26 +19,27 @@ const PAGE_SIZE = 20;
 export default function HistoryPage() {
   const [visits, setVisits] = useState<Visit[]>([]);
   const [loading, setLoading] = useState(true);
-  const [hasMore, setHasMore] = useState(true);
+  const [cursor, setCursor] = useState<string | null>(null);
+  const hasMore = cursor !== null;
 
   const loadMore = useCallback(async () => {
     setLoading(true);
     try {
-      const data = await getMyHistory(PAGE_SIZE, visits.length);
-      setVisits((prev) => [...prev, ...data]);
-      if (data.length < PAGE_SIZE) setHasMore(false);
+      const page = await getMyHistory(PAGE_SIZE, cursor);
+      setVisits((prev) => [...prev, ...page.items]);
+      setCursor(page.nextCursor);
     } catch {
       // ignore
     } finally {
       setLoading(false);
     }
-  }, [visits.length]);
+  }, [cursor]);
 
   useEffect(() => {
-    getMyHistory(PAGE_SIZE, 0)
-      .then((data) => {
-        setVisits(data);
-        if (data.length < PAGE_SIZE) setHasMore(false);
+    getMyHistory(PAGE_SIZE)
+      .then((page) => {
+        setVisits(page.items);
+        setCursor(page.nextCursor);
       })
       .finally(() => setLoading(false));
   }, []);
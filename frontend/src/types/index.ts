@@ -22,6 +22,9 @@ export interface Event {
   trainer_id: number | null;
   trainer_name: string | null;
   price: number;
+  intention_count?: number | null;
+  visit_count?: number | null;
+  my_intention?: boolean | null;
 }
 
 export interface Intention {
@@ -5,18 +5,16 @@ function fmtDate(dateStr: string, timeStr: string): string {
   return dateStr.replace(/-/g, '') + 'T' + timeStr.replace(/:/g, '').slice(0, 6);
 }
 
+// Exports concrete occurrences only; recurring series come from the /api/calendar.ics feed
 function vevent(event: Event): string {
-  const lines = [
+  return [
     'BEGIN:VEVENT',
     `UID:hema-event-${event.id}@hema`,
     `DTSTART;TZID=Europe/Warsaw:${fmtDate(event.date, event.time_start)}`,
     `DTEND;TZID=Europe/Warsaw:${fmtDate(event.date, event.time_end)}`,
-  ];
-  if (event.weekly_id !== null) {
-    lines.push('RRULE:FREQ=WEEKLY');
-  }
-  lines.push(`SUMMARY:${event.name}`, 'END:VEVENT');
-  return lines.join('\r\n');
+    `SUMMARY:${event.name}`,
+    'END:VEVENT',
+  ].join('\r\n');
 }
 
 function wrap(vevents: string[]): string {
@@ -0,0 +1,40 @@
+"""version triggers for users trainers visits
+
+Revision ID: f91e6e8a53aa
+Revises: f37d637b160e
+Create Date: 2026-10-18 17:02:10.878691
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f91e6e8a53aa'
+down_revision: Union[str, Sequence[str], None] = 'f37d637b160e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ("users", "trainers", "visits")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in VERSIONED_TABLES:
+        op.execute(f"INSERT INTO table_versions (table_name) VALUES ('{table}')")
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_table_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER {table}_table_version ON {table}")
+        op.execute(f"DELETE FROM table_versions WHERE table_name = '{table}'")
@@ -0,0 +1,117 @@
+"""bump table versions at commit
+
+Revision ID: 2dabd12efbb7
+Revises: 02548470fac7
+Create Date: 2026-10-18 17:56:56.546565
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2dabd12efbb7'
+down_revision: Union[str, Sequence[str], None] = '02548470fac7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ("events", "weekly_events", "intentions", "users", "trainers", "visits")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Statements that changed rows note their table in a transaction-local setting; no-op
+    # statements (an ON CONFLICT DO NOTHING that hit the conflict, an UPDATE matching
+    # nothing) leave the versions alone
+    op.execute(
+        """
+        CREATE FUNCTION note_table_change() RETURNS trigger AS $$
+        DECLARE
+            changed text := coalesce(current_setting('hema.changed_tables', true), '');
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                IF NOT EXISTS (SELECT 1 FROM old_rows) THEN
+                    RETURN NULL;
+                END IF;
+            ELSIF NOT EXISTS (SELECT 1 FROM new_rows) THEN
+                RETURN NULL;
+            END IF;
+            IF NOT TG_TABLE_NAME = ANY (string_to_array(changed, ',')) THEN
+                PERFORM set_config(
+                    'hema.changed_tables', concat_ws(',', nullif(changed, ''), TG_TABLE_NAME), true
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    # Runs at commit (deferred), bumping every noted table in name order: the version rows
+    # are locked only while committing, and always in the same order, so writers of
+    # several tables cannot deadlock on them
+    op.execute(
+        """
+        CREATE FUNCTION bump_changed_table_versions() RETURNS trigger AS $$
+        DECLARE
+            changed text[] := string_to_array(current_setting('hema.changed_tables', true), ',');
+        BEGIN
+            IF coalesce(cardinality(changed), 0) = 0 THEN
+                RETURN NULL;
+            END IF;
+            PERFORM set_config('hema.changed_tables', '', true);
+            PERFORM 1 FROM table_versions
+            WHERE table_name = ANY (changed) ORDER BY table_name FOR UPDATE;
+            UPDATE table_versions SET version = version + 1, updated_at = now()
+            WHERE table_name = ANY (changed);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER {table}_table_version ON {table}")
+        for event, transition in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            op.execute(
+                f"""
+                CREATE TRIGGER {table}_{event.lower()}_noted
+                AFTER {event} ON {table}
+                REFERENCING {transition} TABLE AS {transition.lower()}_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION note_table_change()
+                """
+            )
+        op.execute(
+            f"""
+            CREATE CONSTRAINT TRIGGER {table}_table_version
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            DEFERRABLE INITIALLY DEFERRED
+            FOR EACH ROW EXECUTE FUNCTION bump_changed_table_versions()
+            """
+        )
+        # TRUNCATE has no rows to defer on; it is rare enough to bump right away
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_truncate_table_version
+            AFTER TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER {table}_truncate_table_version ON {table}")
+        op.execute(f"DROP TRIGGER {table}_table_version ON {table}")
+        for event in ("insert", "update", "delete"):
+            op.execute(f"DROP TRIGGER {table}_{event}_noted ON {table}")
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_table_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+            """
+        )
+    op.execute("DROP FUNCTION bump_changed_table_versions()")
+    op.execute("DROP FUNCTION note_table_change()")
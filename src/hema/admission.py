@@ -0,0 +1,43 @@
+"""Fast 503s while the database pools are saturated."""
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from hema.db import Database
+
+
+class AdmissionControl:
+    """Turns away requests under ``prefix`` while ``max_waiting`` connection checkouts wait.
+
+    Requests already admitted keep waiting up to the pool timeout; new ones are answered
+    right away with 503 and ``Retry-After`` instead of joining the queue.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        database: Database,
+        max_waiting: int,
+        retry_after: int = 1,
+        prefix: str = "/api/",
+    ):
+        self.app = app
+        self.database = database
+        self.max_waiting = max_waiting
+        self.retry_after = retry_after
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] == "http"
+            and scope["path"].startswith(self.prefix)
+            and not self.database.admit(self.max_waiting)
+        ):
+            response = JSONResponse(
+                {"detail": "Server is busy, try again later"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -1,5 +1,7 @@
 """Basic authentication dependencies for API routes."""
 
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
 from typing import Annotated
 
@@ -19,18 +21,74 @@ from hema.models import TrainerModel, UserModel
 
 password_hash = PasswordHash((Argon2Hasher(),))
 
+AUTH_CHANNEL = "auth"
+
+
+class TokenVersions:
+    """In-process copy of ``users.token_version`` for users that revoked tokens.
+
+    Filled from the database on (re)connect of the LISTEN connection and kept current
+    by ``user_id:version`` payloads on the ``auth`` channel.
+    """
+
+    def __init__(self):
+        self._versions: dict[int, int] = {}
+
+    async def load(self) -> None:
+        async with db.context() as session:
+            q = sa.select(UserModel.id, UserModel.token_version).where(UserModel.token_version > 0)
+            self._versions = dict((await session.execute(q)).tuples().all())
+
+    def on_notify(self, payload: str) -> None:
+        user_id, version = map(int, payload.split(":"))
+        self._versions[user_id] = max(version, self._versions.get(user_id, 0))
+
+    def is_current(self, user_id: int, version: int) -> bool:
+        return version >= self._versions.get(user_id, 0)
+
+
+token_versions = TokenVersions()
+
 
 class OAuthPasswordBearer(OAuth2PasswordBearer):
     def __init__(self, token_url: str):
         super().__init__(tokenUrl=token_url)
 
-    async def __call__(self, request: Request, session: AsyncSession = Depends(db.get_db)) -> int:
-        token = await super().__call__(request)
-        payload = self.verify_jwt_token(token=token)
+    async def __call__(
+        self, request: Request, session: AsyncSession = Depends(db.get_primary_read_db)
+    ) -> int:
+        payload = await self.payload(request)
         user_id = payload["user_id"]
-        check_user = await self.check_current_user(user_id, session)
+        if settings.AUTH_STATELESS and "ver" in payload:
+            if not token_versions.is_current(user_id, payload["ver"]):
+                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Token revoked")
+            return user_id
+
+        check_user = await self.check_current_user(user_id, session, payload.get("ver", 0))
         return check_user
 
+    async def optional(
+        self, request: Request, session: AsyncSession = Depends(db.get_primary_read_db)
+    ) -> int | None:
+        # Public endpoints treat a missing or stale token as an anonymous caller
+        if not request.headers.get("Authorization"):
+            return None
+        try:
+            return await self(request, session)
+        except HTTPException:
+            return None
+
+    async def payload(self, request: Request) -> dict:
+        # Cached per request so that __call__ and trainer() decode the token once
+        if not hasattr(request.state, "jwt_payload"):
+            token = await super().__call__(request)
+            payload = self.verify_jwt_token(token=token)
+            # Calendar feed tokens carry "feed" instead and are only good for the feed
+            if "user_id" not in payload:
+                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Invalid token error")
+            request.state.jwt_payload = payload
+        return request.state.jwt_payload
+
     @staticmethod
     def verify_jwt_token(token: str) -> dict:
         if not algorithms.has_crypto:
@@ -44,32 +102,127 @@ class OAuthPasswordBearer(OAuth2PasswordBearer):
         return decoded_token
 
     @staticmethod
-    async def check_current_user(user_id: int, session: AsyncSession) -> int:
-        q = sa.select(UserModel.id).where(UserModel.id == user_id)
-        user_id = await session.scalar(q)
-        if not user_id:
+    async def lookup(session: AsyncSession, q: sa.Select) -> sa.Row | None:
+        try:
+            return (await session.execute(q)).first()
+        finally:
+            # Read sessions autocommit, so the connection can go back to the pool right away
+            # instead of being held by a write route that runs in its own session
+            await session.close()
+
+    @staticmethod
+    def check_token_version(token_version: int | None, version: int) -> None:
+        if token_version is None:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User not found")
+        if version < token_version:
+            raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Token revoked")
+
+    @classmethod
+    async def check_current_user(cls, user_id: int, session: AsyncSession, version: int = 0) -> int:
+        row = await cls.lookup(
+            session, sa.select(UserModel.token_version).where(UserModel.id == user_id)
+        )
+        cls.check_token_version(row and row.token_version, version)
         return user_id
 
-    async def trainer(self, request: Request, session: AsyncSession = Depends(db.get_db)) -> int:
-        user_id = await self(request, session)
-        q = sa.select(TrainerModel.id).where(TrainerModel.id == user_id)
-        trainer_id = await session.scalar(q)
-
-        if not trainer_id:
+    async def trainer(
+        self, request: Request, session: AsyncSession = Depends(db.get_primary_read_db)
+    ) -> int:
+        payload = await self.payload(request)
+        if settings.AUTH_STATELESS and "is_trainer" in payload:
+            user_id = await self(request, session)
+            if not payload["is_trainer"]:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN, detail="Trainer not found"
+                )
+            return user_id
+
+        # Token check and trainer lookup in one query
+        q = (
+            sa.select(UserModel.token_version, TrainerModel.id.label("trainer_id"))
+            .outerjoin(TrainerModel, TrainerModel.id == UserModel.id)
+            .where(UserModel.id == payload["user_id"])
+        )
+        row = await self.lookup(session, q)
+        self.check_token_version(row and row.token_version, payload.get("ver", 0))
+        if row.trainer_id is None:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Trainer not found")
 
-        return trainer_id
+        return row.trainer_id
+
+
+class PasswordHasherPool:
+    """Runs Argon2 off the event loop in a bounded executor.
+
+    Each call blocks for tens of milliseconds, so at most ``workers`` run at once and
+    ``queue`` more may wait; any further call is rejected with 503 right away.
+    """
+
+    def __init__(self, workers: int, queue: int, executor: str = "thread"):
+        self._executor: Executor | None = None
+        if workers > 0:
+            pool = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+            self._executor = pool(max_workers=workers)
+        self._limit = workers + queue
+        self._pending = 0
+
+    async def run(self, func, *args):
+        if self._executor is None:
+            return func(*args)
+        if self._pending >= self._limit:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password checks in progress",
+                headers={"Retry-After": "1"},
+            )
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+hasher_pool = PasswordHasherPool(
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_QUEUE,
+    settings.PASSWORD_HASH_EXECUTOR,
+)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
     return password_hash.verify(plain_password, hashed_password)
 
 
-def password_hashing(user_password: str):
+def _hash(user_password: str) -> str:
     return password_hash.hash(user_password)
 
 
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await hasher_pool.run(_verify, plain_password, hashed_password)
+
+
+async def password_hashing(user_password: str) -> str:
+    return await hasher_pool.run(_hash, user_password)
+
+
+def create_feed_token(user_id: int, version: int) -> str:
+    """Non-expiring token for calendar subscriptions; revoked with ``token_version``."""
+    return jwt.encode({"feed": user_id, "ver": version}, settings.SECRET_KEY, settings.ALGORITHM)
+
+
+async def feed_user_id(token: str, session: AsyncSession) -> int:
+    payload = OAuthPasswordBearer.verify_jwt_token(token)
+    if "feed" not in payload:
+        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Invalid token error")
+    return await OAuthPasswordBearer.check_current_user(
+        payload["feed"], session, payload.get("ver", 0)
+    )
+
+
 def create_jwt_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.now(UTC) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
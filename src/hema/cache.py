@@ -0,0 +1,86 @@
+"""Process-local cache of serialized event weeks.
+
+Entries are dropped on every event or weekly-template change: right after the writing
+transaction commits in this worker, and through NOTIFY on ``events_cache`` in all
+others. The TTL bounds staleness for writes that bypass the services.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from datetime import date
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from hema.config import settings
+
+EVENTS_CACHE_CHANNEL = "events_cache"
+
+# Events of one week as (date, serialized EventResponse) pairs
+Week = list[tuple[date, bytes]]
+
+
+class WeekCache:
+    """LRU with TTL; ``generation`` lets readers skip storing results read before a clear."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.cleared_at = -math.inf
+        self._entries: OrderedDict[Hashable, tuple[float, Week]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Week | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, week: Week, generation: int, max_lag: float = 0.0) -> None:
+        """Store a week read at ``generation``; reads from a replica pass its tolerated lag,
+        since for that long after a clear they may still miss the change."""
+        if self.max_entries <= 0 or generation != self.generation:
+            return
+        if time.monotonic() - self.cleared_at < max_lag:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, week)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self, payload: str = "") -> None:
+        self.generation += 1
+        self.cleared_at = time.monotonic()
+        self._entries.clear()
+
+    async def resync(self) -> None:
+        # Invalidations may have been missed while the LISTEN connection was down
+        self.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+event_cache = WeekCache(settings.EVENTS_CACHE_SIZE, settings.EVENTS_CACHE_TTL_SECONDS)
+
+
+async def invalidate_events(session: AsyncSession) -> None:
+    """Drop cached event weeks in every worker once the session's transaction commits."""
+    # Clearing now keeps in-flight reads of the old data from being stored, clearing again
+    # after commit drops whatever was read in between
+    event_cache.clear()
+    sa.event.listen(session.sync_session, "after_commit", lambda _: event_cache.clear(), once=True)
+    await session.execute(sa.select(sa.func.pg_notify(EVENTS_CACHE_CHANNEL, "")))
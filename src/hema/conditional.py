@@ -0,0 +1,80 @@
+"""Validators for conditional GET, derived from the ``table_versions`` counters."""
+
+import hashlib
+from collections.abc import Callable, Sequence
+from datetime import date, datetime
+from email.utils import format_datetime
+
+import sqlalchemy as sa
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from hema.db import ReadSessionDep
+from hema.models import TableVersionModel
+
+
+async def table_versions(
+    session: AsyncSession, tables: Sequence[str]
+) -> tuple[list[int], datetime | None]:
+    """Current version of each table (0 if never changed) and the latest change time."""
+    q = sa.select(
+        TableVersionModel.table_name, TableVersionModel.version, TableVersionModel.updated_at
+    ).where(TableVersionModel.table_name.in_(tables))
+    rows = {name: (version, at) for name, version, at in (await session.execute(q)).tuples()}
+    versions = [rows[t][0] if t in rows else 0 for t in tables]
+    changed = [at for _, at in rows.values()]
+    return versions, max(changed) if changed else None
+
+
+def etag(*parts, weak: bool = True) -> str:
+    tag = '"' + "-".join(map(str, parts)) + '"'
+    return "W/" + tag if weak else tag
+
+
+def validator_headers(tag: str, last_modified: datetime | None) -> dict[str, str]:
+    # Without Cache-Control browsers may reuse the response without revalidating it
+    headers = {"ETag": tag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def not_modified(request: Request, tag: str) -> bool:
+    """Evaluate If-None-Match.
+
+    If-Modified-Since alone is not trusted: one-second Last-Modified dates are shared by
+    all users, miss changes made within the same second and stay put while a response's
+    date window moves.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    candidates = {t.strip() for t in if_none_match.split(",")}
+    # Weak comparison: W/"x" and "x" match
+    return "*" in candidates or tag.removeprefix("W/") in {t.removeprefix("W/") for t in candidates}
+
+
+def conditional(tables: Sequence[str] | Callable[[Request], Sequence[str]]):
+    """Dependency that answers a matching ``If-None-Match`` with 304 before the endpoint runs.
+
+    The strong ETag combines the versions of ``tables`` (or of the tables picked for the
+    request), the current date and a digest of the URL and credentials, so responses
+    that differ per user or per query never share a tag. Returns the validator headers;
+    they are also set on the response unless the endpoint returns a ``Response`` itself.
+    """
+
+    async def dependency(request: Request, response: Response, session: ReadSessionDep) -> dict:
+        names = tables(request) if callable(tables) else tables
+        versions, last_modified = await table_versions(session, names)
+        credentials = request.headers.get("authorization", "")
+        variant = hashlib.blake2b(
+            f"{request.url.path}?{request.url.query}|{credentials}".encode(), digest_size=8
+        ).hexdigest()
+        tag = etag(*versions, date.today().toordinal(), variant, weak=False)
+        headers = validator_headers(tag, last_modified)
+        if not_modified(request, tag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+        return headers
+
+    return dependency
@@ -1,7 +1,14 @@
+import asyncio
 import logging
+import math
+import time
+import uuid
+from collections.abc import Sequence
 from contextlib import asynccontextmanager
+from itertools import cycle
 from typing import Annotated
 
+import sqlalchemy as sa
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
@@ -11,30 +18,163 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from hema.config import settings
+from hema.pool import InstrumentedNullPool, InstrumentedPool, PoolStats, instrumented
+
+logger = logging.getLogger(__name__)
+
+# Seconds since the last replayed transaction, or 0 when everything received is replayed
+# (an idle primary sends nothing, so the replay timestamp alone would keep growing)
+REPLICA_LAG = sa.text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery()"
+    " OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
+).execution_options(untracked=True)
+
+
+def prepared_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+def create_engine(database_url: str, connect_timeout: float | None = None) -> AsyncEngine:
+    options = {}
+    if settings.DB_EXTERNAL_POOLER:
+        # A transaction-mode pooler hands out a different server connection per
+        # transaction: statements prepared earlier are not there, and default names
+        # ("__asyncpg_stmt_1__") collide with other clients' on the same server connection
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": prepared_statement_name,
+        }
+    if connect_timeout is not None:
+        options.setdefault("connect_args", {})["timeout"] = connect_timeout
+    if settings.DB_NULL_POOL:
+        options["poolclass"] = instrumented(InstrumentedNullPool, PoolStats())
+    else:
+        options |= {
+            "poolclass": instrumented(InstrumentedPool, PoolStats()),
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+        }
+    return create_async_engine(database_url, echo=False, future=True, **options)
+
+
+def read_sessionmaker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    # Same pool; asyncpg sends no BEGIN/COMMIT for AUTOCOMMIT connections
+    return async_sessionmaker(
+        engine.execution_options(isolation_level="AUTOCOMMIT"), expire_on_commit=False
+    )
+
+
+class Replica:
+    """Read-only engine with its replication lag, re-measured at most every ``interval``.
+
+    Connecting and measuring are bounded by ``timeout``, so a replica that stopped
+    answering is skipped quickly instead of stalling reads until TCP gives up.
+    """
+
+    def __init__(self, database_url: str, interval: float, timeout: float = 1.0):
+        self.engine = create_engine(database_url, connect_timeout=timeout)
+        self.session = read_sessionmaker(self.engine)
+        self.interval = interval
+        self.timeout = timeout
+        self.lag = math.inf
+        self.checked_at = -math.inf
+        self.available = True
+
+    async def current_lag(self) -> float:
+        if time.monotonic() - self.checked_at < self.interval:
+            return self.lag
+        # Concurrent requests keep using the previous value while this one measures
+        self.checked_at = time.monotonic()
+        try:
+            async with asyncio.timeout(self.timeout), self.engine.connect() as connection:
+                lag = await connection.scalar(REPLICA_LAG)
+            self.lag = math.inf if lag is None else float(lag)
+            self.available = True
+        except Exception:
+            if self.available:
+                logger.warning("Replica %s is unavailable", self.engine.url, exc_info=True)
+            self.lag = math.inf
+            self.available = False
+        return self.lag
 
 
 class Database:
     engine: AsyncEngine = None
     async_session: async_sessionmaker[AsyncSession] = None
 
-    def __init__(self, database_url: str, echo: bool = False):
-        self.engine = create_async_engine(
-            database_url,
-            echo=False,
-            future=True,
-            pool_size=10,
-            max_overflow=20,
-            pool_timeout=30,
-        )
+    def __init__(
+        self,
+        database_url: str,
+        replica_urls: Sequence[str] = (),
+        max_lag: float = 5.0,
+        check_interval: float = 2.0,
+        replica_timeout: float = 1.0,
+        echo: bool = False,
+    ):
+        self.engine = create_engine(database_url)
         if echo:
             logging.getLogger("sqlalchemy.engine.Engine").handlers.clear()
 
         self.async_session = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.read_session = read_sessionmaker(self.engine)
+        self.max_lag = max_lag
+        self.replicas = [Replica(url, check_interval, replica_timeout) for url in replica_urls]
+        self._replicas = cycle(self.replicas)
+        self.rejected = 0
+
+    @property
+    def engines(self) -> dict[str, AsyncEngine]:
+        return {
+            "primary": self.engine,
+            **{f"replica{i}": r.engine for i, r in enumerate(self.replicas, 1)},
+        }
+
+    def waiting(self) -> int:
+        """Connection checkouts currently waiting, over all pools."""
+        return sum(engine.pool.stats.waiting for engine in self.engines.values())
+
+    def admit(self, max_waiting: int) -> bool:
+        if 0 < max_waiting <= self.waiting():
+            self.rejected += 1
+            return False
+        return True
+
+    def pool_stats(self) -> dict:
+        return {
+            "rejected": self.rejected,
+            "pools": {name: engine.pool.status_dict() for name, engine in self.engines.items()},
+        }
 
     async def get_db(self) -> AsyncSession:
         async with self.async_session() as session, session.begin():
             yield session
 
+    async def get_read_db(self) -> AsyncSession:
+        """Session for reads: every statement commits on its own and the pooled connection
+        is only checked out when the first one runs. Nothing written through it is atomic.
+
+        Replicas take turns; one lagging more than ``max_lag`` (or unreachable) is skipped,
+        and the primary serves the read when none is fresh enough. Sessions on a replica
+        carry the tolerated lag in ``session.info["max_lag"]``.
+        """
+        for _ in self.replicas:
+            replica = next(self._replicas)
+            if await replica.current_lag() <= self.max_lag:
+                async with replica.session(info={"max_lag": self.max_lag}) as session:
+                    yield session
+                return
+        async with self.read_session() as session:
+            yield session
+
+    async def get_primary_read_db(self) -> AsyncSession:
+        """Autocommit session on the primary, for reads that must see the latest commits
+        (token revocation, accounts registered a moment ago)."""
+        async with self.read_session() as session:
+            yield session
+
     @asynccontextmanager
     async def context(self) -> AsyncSession:
         async with asynccontextmanager(self.get_db)() as session:
@@ -42,6 +182,13 @@ class Database:
 
 
 # Create a single instance
-db = Database(settings.DB_URI)
+db = Database(
+    settings.DB_URI,
+    replica_urls=settings.DB_REPLICA_URIS,
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.DB_REPLICA_CHECK_SECONDS,
+    replica_timeout=settings.DB_REPLICA_TIMEOUT_SECONDS,
+)
 
 SessionDep = Annotated[AsyncSession, Depends(db.get_db)]
+ReadSessionDep = Annotated[AsyncSession, Depends(db.get_read_db)]
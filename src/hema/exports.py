@@ -0,0 +1,155 @@
+"""Incremental CSV and XLSX writers for streamed exports.
+
+Both take the header and an async iterator of rows and yield ``bytes`` chunks as rows
+arrive, so the whole file is never held in memory.
+"""
+
+import csv
+import io
+import zipfile
+from collections.abc import AsyncIterator, Iterable, Sequence
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+CHUNK_ROWS = 500
+
+# Spreadsheets run text cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+Row = Sequence
+
+
+def cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="seconds")
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def csv_cell(value) -> str:
+    """Cell text with user-supplied strings that look like formulas quoted with ``'``.
+
+    Numbers stay as they are (a negative payment is not a formula); XLSX marks text cells
+    as strings instead.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return cell_text(value)
+
+
+async def csv_chunks(header: Row, rows: AsyncIterator[Row]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    count = 0
+    async for row in rows:
+        writer.writerow([csv_cell(v) for v in row])
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+class _Sink:
+    """Write-only file object that hands written bytes back to the generator.
+
+    Without ``seek``/``tell`` zipfile writes data descriptors after each member
+    instead of going back to patch the local headers.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" '
+        'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/officeDocument"/>'
+        "</Relationships>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" Type="http://schemas.'
+        'openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        "</Relationships>"
+    ),
+}
+
+WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    "</workbook>"
+)
+
+SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_END = "</sheetData></worksheet>"
+
+
+def xlsx_row(values: Iterable) -> str:
+    cells = []
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, int | float):
+            text = escape(cell_text(value))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+        else:
+            cells.append(f'<c t="n"><v>{value}</v></c>')
+    return f"<row>{''.join(cells)}</row>"
+
+
+async def xlsx_chunks(
+    header: Row, rows: AsyncIterator[Row], sheet: str = "Export"
+) -> AsyncIterator[bytes]:
+    """Single-sheet workbook with inline strings; dates are written as ISO text."""
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr("xl/workbook.xml", WORKBOOK.format(name=escape(sheet)))
+
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as part:
+            part.write((SHEET_START + xlsx_row(header)).encode())
+            count = 0
+            async for row in rows:
+                part.write(xlsx_row(row).encode())
+                count += 1
+                if count % CHUNK_ROWS == 0:
+                    yield sink.drain()
+            part.write(SHEET_END.encode())
+    yield sink.drain()
@@ -0,0 +1,170 @@
+"""Minimal RFC 5545 writer for the calendar feed."""
+
+from collections.abc import Iterable
+from datetime import UTC, date, datetime, time, timedelta
+from functools import cache
+from zoneinfo import ZoneInfo
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+def escape_text(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def fold(line: str) -> str:
+    """Split a content line into 75-octet chunks joined by CRLF + space."""
+    raw = line.encode()
+    if len(raw) <= 75:
+        return line
+    parts, start = [], 0
+    while start < len(raw):
+        end = min(start + (75 if not parts else 74), len(raw))
+        # Never split inside a multi-byte UTF-8 sequence
+        while end < len(raw) and raw[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(raw[start:end].decode())
+        start = end
+    return "\r\n ".join(parts)
+
+
+def local(day: date, at: time) -> str:
+    return datetime.combine(day, at).strftime("%Y%m%dT%H%M%S")
+
+
+def utc(moment: datetime) -> str:
+    return moment.astimezone(UTC).strftime("%Y%m%dT%H%M%SZ")
+
+
+def utc_offset(delta: timedelta) -> str:
+    minutes = int(delta.total_seconds()) // 60
+    sign = "-" if minutes < 0 else "+"
+    return f"{sign}{abs(minutes) // 60:02d}{abs(minutes) % 60:02d}"
+
+
+def transitions(zone: ZoneInfo, year: int) -> list[tuple[datetime, timedelta, timedelta, str]]:
+    """Offset changes in ``year``: local time they happen at (before the change), offset
+    before, offset after and the zone name after."""
+    found = []
+    moment = datetime(year, 1, 1, tzinfo=UTC)
+    offset = moment.astimezone(zone).utcoffset()
+    while moment.year == year:
+        moment += timedelta(hours=1)
+        after = moment.astimezone(zone)
+        if after.utcoffset() != offset:
+            found.append(
+                ((moment + offset).replace(tzinfo=None), offset, after.utcoffset(), after.tzname())
+            )
+            offset = after.utcoffset()
+    return found
+
+
+def yearly_onset(moment: datetime) -> tuple[str, datetime]:
+    """RRULE repeating ``moment``'s weekday-in-month every year, and its first date in 1970."""
+    last = (moment + timedelta(weeks=1)).month != moment.month
+    ordinal = -1 if last else (moment.day - 1) // 7 + 1
+    rule = f"FREQ=YEARLY;BYMONTH={moment.month};BYDAY={ordinal}{WEEKDAYS[moment.weekday()]}"
+
+    if last:
+        day = date(1970 + moment.month // 12, moment.month % 12 + 1, 1) - timedelta(days=1)
+        day -= timedelta(days=(day.weekday() - moment.weekday()) % 7)
+    else:
+        day = date(1970, moment.month, 1)
+        day += timedelta(days=(moment.weekday() - day.weekday()) % 7, weeks=ordinal - 1)
+    return rule, datetime.combine(day, moment.time())
+
+
+@cache
+def vtimezone(tz: str, year: int) -> tuple[str, ...]:
+    """VTIMEZONE for ``tz`` with the rules it follows in ``year``.
+
+    Every ``TZID`` used in a calendar needs one (RFC 5545 3.2.19); clients without it
+    fall back to floating times.
+    """
+    zone = ZoneInfo(tz)
+    lines = ["BEGIN:VTIMEZONE", f"TZID:{tz}"]
+    changes = transitions(zone, year)
+    if not changes:
+        moment = datetime(year, 1, 1, tzinfo=zone)
+        offset = utc_offset(moment.utcoffset())
+        lines += [
+            "BEGIN:STANDARD",
+            "DTSTART:19700101T000000",
+            f"TZOFFSETFROM:{offset}",
+            f"TZOFFSETTO:{offset}",
+            f"TZNAME:{moment.tzname()}",
+            "END:STANDARD",
+        ]
+    for at, before, after, name in changes:
+        kind = "DAYLIGHT" if after > before else "STANDARD"
+        rule, first = yearly_onset(at)
+        lines += [
+            f"BEGIN:{kind}",
+            f"DTSTART:{first.strftime('%Y%m%dT%H%M%S')}",
+            f"RRULE:{rule}",
+            f"TZOFFSETFROM:{utc_offset(before)}",
+            f"TZOFFSETTO:{utc_offset(after)}",
+            f"TZNAME:{name}",
+            f"END:{kind}",
+        ]
+    return (*lines, "END:VTIMEZONE")
+
+
+class Calendar:
+    def __init__(self, tz: str, stamp: datetime, name: str = "HEMA"):
+        self.tz = tz
+        self.stamp = stamp
+        self.lines = [
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//HEMA Calendar//PL",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{escape_text(name)}",
+            f"X-WR-TIMEZONE:{tz}",
+            *vtimezone(tz, date.today().year),
+        ]
+
+    def event(
+        self,
+        uid: str,
+        summary: str,
+        day: date,
+        time_start: time,
+        time_end: time,
+        rrule: str | None = None,
+        exdates: Iterable[date] = (),
+    ) -> None:
+        self.lines += [
+            "BEGIN:VEVENT",
+            f"UID:{uid}",
+            f"DTSTAMP:{utc(self.stamp)}",
+            f"DTSTART;TZID={self.tz}:{local(day, time_start)}",
+            f"DTEND;TZID={self.tz}:{local(day, time_end)}",
+            f"SUMMARY:{escape_text(summary)}",
+        ]
+        if rrule:
+            self.lines.append(f"RRULE:{rrule}")
+        exdates = sorted(exdates)
+        if exdates:
+            values = ",".join(local(d, time_start) for d in exdates)
+            self.lines.append(f"EXDATE;TZID={self.tz}:{values}")
+        self.lines.append("END:VEVENT")
+
+    def weekly(
+        self,
+        uid: str,
+        summary: str,
+        first: date,
+        last: date,
+        time_start: time,
+        time_end: time,
+        exdates: Iterable[date] = (),
+    ) -> None:
+        # With a TZID start, UNTIL has to be given in UTC
+        until = datetime.combine(last, time_start, tzinfo=ZoneInfo(self.tz))
+        rrule = f"FREQ=WEEKLY;BYDAY={WEEKDAYS[first.weekday()]};UNTIL={utc(until)}"
+        self.event(uid, summary, first, time_start, time_end, rrule=rrule, exdates=exdates)
+
+    def render(self) -> str:
+        return "\r\n".join(map(fold, [*self.lines, "END:VCALENDAR"])) + "\r\n"
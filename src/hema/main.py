@@ -2,17 +2,25 @@ from contextlib import asynccontextmanager
 from os import environ
 
 import sentry_sdk
+import sqlalchemy as sa
 import uvicorn
-from fastapi import FastAPI, status
+from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 
+from hema.admission import AdmissionControl
+from hema.auth import AUTH_CHANNEL, hasher_pool, token_versions
+from hema.cache import EVENTS_CACHE_CHANNEL, event_cache
 from hema.config import settings
 from hema.db import db
 from hema.exceptions import AlreadyExists
+from hema.monitoring import MetricsMiddleware, exposition, instrument
+from hema.notify import notifier
+from hema.pagination import NEXT_CURSOR_HEADER
 from hema.routers import api_router
-from hema.services.weekly_event_service import WeeklyEventService
+from hema.scheduler import scheduler
+from hema.slow_queries import slow_queries
 
 if settings.SENTRY_DSN is not None:
     docker = bool(environ.get("DOCKER") or False)
@@ -25,9 +33,16 @@ if settings.SENTRY_DSN is not None:
 
 @asynccontextmanager
 async def lifespan(api: FastAPI):
-    async with db.context() as session:
-        await WeeklyEventService(session).sync_future_events()
+    if settings.AUTH_STATELESS:
+        notifier.subscribe(AUTH_CHANNEL, token_versions.on_notify, resync=token_versions.load)
+    if settings.EVENTS_CACHE_SIZE > 0:
+        notifier.subscribe(EVENTS_CACHE_CHANNEL, event_cache.clear, resync=event_cache.resync)
+    notifier.start()
+    scheduler.start()
     yield
+    await scheduler.stop()
+    await notifier.stop()
+    hasher_pool.shutdown()
 
 
 api = FastAPI(
@@ -37,14 +52,28 @@ api = FastAPI(
     version="0.1.0",
 )
 
-# CORS middleware for frontend dev server
+api.add_middleware(
+    AdmissionControl,
+    database=db,
+    max_waiting=settings.DB_POOL_MAX_WAITING,
+    retry_after=settings.DB_POOL_RETRY_AFTER_SECONDS,
+)
+# CORS middleware for frontend dev server, outside admission control so its 503s carry
+# the CORS headers the browser needs to read them
 api.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+# Outermost, so requests turned away by admission control are counted too
+api.add_middleware(MetricsMiddleware)
+for name, engine in db.engines.items():
+    instrument(engine)
+    if settings.SQL_SLOW_MS:
+        slow_queries.instrument(name, engine)
 
 # Mount static files
 api.mount("/static", StaticFiles(directory=str(settings.ROOT / "static")), name="static")
@@ -68,6 +97,14 @@ def health_check():
     return {"message": "Alive"}
 
 
+@api.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    token = settings.METRICS_TOKEN
+    if token is not None and request.headers.get("authorization") != f"Bearer {token}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    return Response(exposition(db), media_type="text/plain; version=0.0.4")
+
+
 # SPA fallback: serve index.html for non-API routes
 @api.get("/{path:path}", include_in_schema=False)
 async def spa_fallback(path: str):
@@ -82,6 +119,15 @@ def handle_already_exists(request, exc):
     return JSONResponse(status_code=status.HTTP_409_CONFLICT, content={"detail": str(exc)})
 
 
+@api.exception_handler(sa.exc.TimeoutError)
+def handle_pool_timeout(request, _):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "No database connection available"},
+        headers={"Retry-After": str(settings.DB_POOL_RETRY_AFTER_SECONDS)},
+    )
+
+
 if __name__ == "__main__":
     uvicorn.run(
         api,
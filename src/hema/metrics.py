@@ -0,0 +1,115 @@
+"""In-process metric primitives and the Prometheus text format."""
+
+import math
+from bisect import bisect_left
+from collections.abc import Iterable, Sequence
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{escape_label(str(v))}"' for k, v in labels.items()) + "}"
+
+
+class Histogram:
+    """Observation counts per upper bound (``le``), cumulative like Prometheus buckets."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        total, result = 0, []
+        for bound, count in zip((*self.buckets, math.inf), self.counts, strict=True):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "buckets": {format_value(b): n for b, n in self.cumulative()},
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class Family:
+    """A metric with one child value per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labels = tuple(labels)
+        self.children: dict[tuple[str, ...], object] = {}
+
+    def samples(self, labels: dict[str, str], child) -> list[str]:
+        return [f"{self.name}{format_labels(labels)} {format_value(child)}"]
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self.children.items()):
+            lines += self.samples(dict(zip(self.labels, values, strict=True)), child)
+        return lines
+
+
+class Counter(Family):
+    kind = "counter"
+
+    def inc(self, *values: str, amount: float = 1) -> None:
+        self.children[values] = self.children.get(values, 0) + amount
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *values: str) -> None:
+        self.children[values] = value
+
+
+class HistogramFamily(Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str], buckets: Sequence[float]):
+        super().__init__(name, doc, labels)
+        self.buckets = buckets
+
+    def child(self, *values: str) -> Histogram:
+        histogram = self.children.get(values)
+        if histogram is None:
+            histogram = self.children[values] = Histogram(self.buckets)
+        return histogram
+
+    def observe(self, value: float, *values: str) -> None:
+        self.child(*values).observe(value)
+
+    def samples(self, labels: dict[str, str], child: Histogram) -> list[str]:
+        lines = [
+            f"{self.name}_bucket{format_labels({**labels, 'le': format_value(bound)})} {count}"
+            for bound, count in child.cumulative()
+        ]
+        lines.append(f"{self.name}_sum{format_labels(labels)} {format_value(child.sum)}")
+        lines.append(f"{self.name}_count{format_labels(labels)} {child.count}")
+        return lines
+
+
+def render(families: Iterable[Family]) -> str:
+    return "\n".join(line for family in families for line in family.render()) + "\n"
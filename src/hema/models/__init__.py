@@ -5,3 +5,5 @@ from .users import UserModel
 from .visits import VisitModel
 from .weekly_events import WeeklyEventModel
 from .payments import UserPaymentHistory
+from .balances import UserBalanceModel
+from .table_versions import TableVersionModel
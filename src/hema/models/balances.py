@@ -0,0 +1,10 @@
+import sqlalchemy as sa
+
+from .base import Base
+
+
+class UserBalanceModel(Base):
+    __tablename__ = "balances"
+
+    user_id = sa.Column(sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    balance = sa.Column(sa.Integer, nullable=False, server_default="0")
@@ -23,3 +23,9 @@ class EventModel(Base):
     trainer_id = sa.Column(sa.Integer, sa.ForeignKey("trainers.id", ondelete="SET NULL"))
 
     price = sa.Column(sa.Integer, server_default="0")
+
+    __table_args__ = (
+        sa.UniqueConstraint("weekly_id", "date"),
+        sa.Index("ix_events_date", "date"),
+        sa.Index("ix_events_trainer_id_date", "trainer_id", "date"),
+    )
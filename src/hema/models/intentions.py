@@ -9,3 +9,8 @@ class IntentionModel(Base):
     id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
     user_id = sa.Column(sa.Integer, sa.ForeignKey("users.id"))
     event_id = sa.Column(sa.Integer, sa.ForeignKey("events.id"))
+
+    __table_args__ = (
+        sa.UniqueConstraint("user_id", "event_id"),
+        sa.Index("ix_intentions_event_id", "event_id", postgresql_include=["user_id"]),
+    )
@@ -9,5 +9,15 @@ class UserPaymentHistory(Base):
     user_id = sa.Column(sa.Integer, sa.ForeignKey("users.id"))
     trainer_id = sa.Column(sa.Integer, sa.ForeignKey("trainers.id"))
     payment = sa.Column(sa.Integer)
-    timestamp = sa.Column(sa.DateTime, server_default=sa.func.now())
+    timestamp = sa.Column(sa.DateTime, nullable=False, server_default=sa.func.now())
     comment = sa.Column(sa.String, nullable=True)
+
+    __table_args__ = (
+        sa.Index(
+            "ix_payment_history_user_id_timestamp_id",
+            "user_id",
+            sa.text("timestamp DESC"),
+            sa.text("id DESC"),
+        ),
+        sa.Index("ix_payment_history_timestamp", "timestamp"),
+    )
@@ -0,0 +1,13 @@
+import sqlalchemy as sa
+
+from .base import Base
+
+
+class TableVersionModel(Base):
+    """Change counter per table, bumped at commit by triggers on the table (see migrations)."""
+
+    __tablename__ = "table_versions"
+
+    table_name = sa.Column(sa.String, primary_key=True)
+    version = sa.Column(sa.BigInteger, nullable=False, server_default="0")
+    updated_at = sa.Column(sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now())
@@ -13,3 +13,6 @@ class UserModel(Base):
     phone = sa.Column(sa.String(), nullable=True, unique=True)
 
     gender = sa.Column(sa.String(), nullable=True, default=UserGender.OTHER)
+
+    # Bumped to revoke issued tokens; changes are broadcast on the "auth" NOTIFY channel
+    token_version = sa.Column(sa.Integer, nullable=False, server_default="0")
@@ -14,5 +14,16 @@ class VisitModel(Base):
         sa.Integer, sa.ForeignKey("trainers.id", ondelete="RESTRICT"), nullable=False
     )
     timestamp = sa.Column(sa.DateTime, nullable=False, server_default=sa.text("now()"))
+    price = sa.Column(sa.Integer, nullable=False, server_default="0")
 
-    __table_args__ = (sa.PrimaryKeyConstraint("user_id", "event_id"),)
+    __table_args__ = (
+        sa.PrimaryKeyConstraint("user_id", "event_id"),
+        sa.Index(
+            "ix_visits_user_id_timestamp_event_id",
+            "user_id",
+            sa.text("timestamp DESC"),
+            sa.text("event_id DESC"),
+        ),
+        sa.Index("ix_visits_event_id", "event_id"),
+        sa.Index("ix_visits_timestamp", "timestamp"),
+    )
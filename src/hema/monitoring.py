@@ -0,0 +1,214 @@
+"""Request and SQL metrics, served in the Prometheus text format on ``/metrics``."""
+
+import logging
+import time
+from collections import Counter as Occurrences
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from hema.cache import event_cache
+from hema.config import settings
+from hema.db import Database
+from hema.metrics import Counter, Gauge, HistogramFamily, render
+
+logger = logging.getLogger(__name__)
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+ROUTE_LABELS = ("method", "route")
+
+in_flight = Gauge("hema_http_requests_in_flight", "Requests being served")
+responses = Counter(
+    "hema_http_responses_total", "Responses by route and status", (*ROUTE_LABELS, "status")
+)
+latency = HistogramFamily(
+    "hema_http_request_duration_seconds", "Request latency", ROUTE_LABELS, SECONDS_BUCKETS
+)
+sql_statements = HistogramFamily(
+    "hema_db_statements_per_request", "SQL statements per request", ROUTE_LABELS, STATEMENT_BUCKETS
+)
+sql_seconds = HistogramFamily(
+    "hema_db_seconds_per_request", "Time spent in SQL per request", ROUTE_LABELS, SECONDS_BUCKETS
+)
+over_budget = Counter(
+    "hema_db_query_budget_exceeded_total", "Requests over their route's query budget", ROUTE_LABELS
+)
+
+# Called with a description of every request over budget or with repeated statements
+# (see ``hema.testing``)
+problem_listeners: list[Callable[[str], None]] = []
+
+
+@dataclass
+class RequestSql:
+    statements: int = 0
+    seconds: float = 0.0
+    started: float = 0.0
+    # Statement text -> executions, only kept when SQL_REPEAT_WARNING is set
+    shapes: Occurrences[str] = field(default_factory=Occurrences)
+
+
+current_sql: ContextVar[RequestSql | None] = ContextVar("current_sql", default=None)
+
+
+def _tracked(context) -> RequestSql | None:
+    # Housekeeping such as replica lag checks opts out with ``untracked=True``
+    if context is not None and context.execution_options.get("untracked"):
+        return None
+    return current_sql.get()
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    sql = _tracked(context)
+    if sql is not None:
+        sql.started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    sql = _tracked(context)
+    if sql is not None:
+        sql.statements += 1
+        sql.seconds += time.perf_counter() - sql.started
+        if settings.SQL_REPEAT_WARNING:
+            sql.shapes[statement] += 1
+
+
+def instrument(engine: AsyncEngine) -> None:
+    """Attribute the engine's statements to the request running them."""
+    # The async engine runs these hooks in a greenlet that shares the request's context
+    sa.event.listen(engine.sync_engine, "before_cursor_execute", _before_execute)
+    sa.event.listen(engine.sync_engine, "after_cursor_execute", _after_execute)
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the matched route; templates keep the label set bounded."""
+    # Routes of included routers know only their own path, FastAPI keeps the full one here
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    if context is not None:
+        return context.path
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mounted apps (static files) or requests turned away before routing
+    return scope.get("root_path") or "unmatched"
+
+
+def query_budget(statements: int) -> Callable[[Request], None]:
+    """Route dependency declaring how many SQL statements one request may run.
+
+    Requests over budget are counted, logged and reported to ``problem_listeners``.
+    """
+
+    def dependency(request: Request) -> None:
+        request.scope["query_budget"] = statements
+
+    return dependency
+
+
+def report(method: str, route: str, sql: RequestSql, budget: int | None) -> None:
+    problems = []
+    if budget is not None and sql.statements > budget:
+        over_budget.inc(method, route)
+        problems.append(f"{method} {route} ran {sql.statements} statements, budget {budget}")
+    # Same statement over and over within one request usually is an N+1 loop
+    for statement, count in sql.shapes.items():
+        if count >= settings.SQL_REPEAT_WARNING:
+            shape = " ".join(statement.split())[:200]
+            problems.append(f"{method} {route} ran {count} times: {shape}")
+    for problem in problems:
+        logger.warning(problem)
+        for listener in problem_listeners:
+            listener(problem)
+
+
+class MetricsMiddleware:
+    """Records latency, status and SQL use of every HTTP request by route template."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        sql = RequestSql()
+        token = current_sql.set(sql)
+        in_flight.inc(amount=1)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.inc(amount=-1)
+            current_sql.reset(token)
+            labels = (scope["method"], route_template(scope))
+            responses.inc(*labels, str(status))
+            latency.observe(elapsed, *labels)
+            sql_statements.observe(sql.statements, *labels)
+            sql_seconds.observe(sql.seconds, *labels)
+            report(*labels, sql, scope.get("query_budget"))
+
+
+def exposition(database: Database) -> str:
+    """All metrics; pool and cache figures are read at scrape time."""
+    pool_connections = Gauge(
+        "hema_db_pool_connections", "Pooled connections by state", ("pool", "state")
+    )
+    pool_waiting = Gauge("hema_db_pool_waiting", "Checkouts waiting for a connection", ("pool",))
+    pool_timeouts = Counter("hema_db_pool_timeouts_total", "Checkouts that timed out", ("pool",))
+    pool_wait = HistogramFamily(
+        "hema_db_pool_wait_seconds", "Connection checkout time", ("pool",), ()
+    )
+    for name, engine in database.engines.items():
+        pool = engine.pool
+        for state, value in pool.status_dict().items():
+            if state in ("checked_out", "idle", "overflow"):
+                pool_connections.set(value, name, state)
+        pool_waiting.set(pool.stats.waiting, name)
+        pool_timeouts.inc(name, amount=pool.stats.timeouts)
+        pool_wait.children[(name,)] = pool.stats.wait
+
+    rejected = Counter(
+        "hema_http_rejected_total", "Requests turned away while the pools were saturated"
+    )
+    rejected.inc(amount=database.rejected)
+
+    cache = Counter("hema_events_cache_lookups_total", "Events week cache lookups", ("result",))
+    cache.inc("hit", amount=event_cache.hits)
+    cache.inc("miss", amount=event_cache.misses)
+    cache_entries = Gauge("hema_events_cache_entries", "Weeks held in the events cache")
+    cache_entries.set(event_cache.stats()["entries"])
+
+    return render(
+        [
+            in_flight,
+            responses,
+            latency,
+            sql_statements,
+            sql_seconds,
+            over_budget,
+            pool_connections,
+            pool_waiting,
+            pool_timeouts,
+            pool_wait,
+            rejected,
+            cache,
+            cache_entries,
+        ]
+    )
@@ -0,0 +1,83 @@
+"""Postgres LISTEN/NOTIFY fan-out to in-process subscribers."""
+
+import asyncio
+import contextlib
+import logging
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from hema.config import settings
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[str], None]
+Resync = Callable[[], Awaitable[None]]
+
+
+class Notifier:
+    """Holds one dedicated LISTEN connection and dispatches payloads by channel.
+
+    Notifications sent while the connection is down are lost, so every subscriber may
+    register a ``resync`` coroutine that runs after each (re)connect.
+    """
+
+    def __init__(self, dsn: str, reconnect_delay: float = 5.0):
+        self.dsn = dsn
+        self.reconnect_delay = reconnect_delay
+        self._callbacks: dict[str, list[Callback]] = defaultdict(list)
+        self._resyncs: list[Resync] = []
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, channel: str, callback: Callback, resync: Resync | None = None) -> None:
+        self._callbacks[channel].append(callback)
+        if resync is not None:
+            self._resyncs.append(resync)
+
+    def _dispatch(self, connection, pid, channel: str, payload: str) -> None:
+        for callback in self._callbacks[channel]:
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception("Notification handler for %s failed", channel)
+
+    async def _listen(self) -> None:
+        while True:
+            connection = None
+            closed = asyncio.Event()
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                connection.add_termination_listener(lambda _, event=closed: event.set())
+                for channel in self._callbacks:
+                    await connection.add_listener(channel, self._dispatch)
+                for resync in self._resyncs:
+                    await resync()
+                await closed.wait()
+            except Exception:
+                logger.exception("LISTEN connection failed")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    def start(self) -> None:
+        if self._task is None and self._callbacks:
+            self._task = asyncio.create_task(self._listen(), name="notifier")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+
+def driver_dsn(uri: str) -> str:
+    """Turn an SQLAlchemy URL into a plain libpq DSN for asyncpg."""
+    return make_url(uri).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+notifier = Notifier(driver_dsn(settings.DB_LISTEN_URI or settings.DB_URI))
@@ -0,0 +1,51 @@
+"""Opaque keyset cursors for history endpoints.
+
+A cursor encodes the ``(timestamp, id)`` of the last row of a page; the next page
+starts strictly after it in ``timestamp DESC, id DESC`` order.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, Query, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+Cursor = tuple[datetime, int]
+
+
+def encode_cursor(timestamp: datetime, key: int) -> str:
+    raw = json.dumps([timestamp.isoformat(), key]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, key = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(key)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def cursor_param(cursor: str | None = Query(default=None)) -> Cursor | None:
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+
+CursorDep = Annotated[Cursor | None, Depends(cursor_param)]
+
+
+def paginate(rows: list, limit: int, response: Response, key: str) -> list:
+    """Trim rows fetched with ``limit + 1`` and set the next-page header if there are more."""
+    if len(rows) <= limit:
+        return rows
+    rows = rows[:limit]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1]["timestamp"], rows[-1][key])
+    return rows
@@ -0,0 +1,62 @@
+"""Connection pools with checkout statistics."""
+
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool
+
+from hema.metrics import Histogram
+
+# Seconds a checkout took, including connecting when the pool had to open a connection
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class PoolStats:
+    def __init__(self):
+        self.waiting = 0
+        self.timeouts = 0
+        self.wait = Histogram(WAIT_BUCKETS)
+
+
+class Instrumented(Pool):
+    stats: PoolStats
+
+    def connect(self):
+        self.stats.waiting += 1
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.waiting -= 1
+            self.stats.wait.observe(time.perf_counter() - started)
+
+    def status_dict(self) -> dict:
+        return {
+            "waiting": self.stats.waiting,
+            "timeouts": self.stats.timeouts,
+            "wait_seconds": self.stats.wait.snapshot(),
+        }
+
+
+class InstrumentedPool(Instrumented, AsyncAdaptedQueuePool):
+    def status_dict(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            **super().status_dict(),
+        }
+
+
+class InstrumentedNullPool(Instrumented, NullPool):
+    """Opens a connection per checkout, leaving pooling to an external pooler."""
+
+
+def instrumented(pool_class: type[Instrumented], stats: PoolStats) -> type[Instrumented]:
+    # A subclass per engine: the pool re-creates itself from its class after dispose or
+    # a disconnect, so the stats have to live there rather than on the instance
+    return type(pool_class.__name__, (pool_class,), {"stats": stats})
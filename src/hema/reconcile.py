@@ -0,0 +1,19 @@
+"""Rebuild the balances ledger from payment_history and visits.
+
+Usage: python -m hema.reconcile
+"""
+
+import asyncio
+
+from hema.db import db
+from hema.services.payment_service import PaymentService
+
+
+async def main() -> None:
+    async with db.context() as session:
+        count = await PaymentService(session).reconcile_balances()
+    print(f"Reconciled {count} balances")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
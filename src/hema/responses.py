@@ -0,0 +1,22 @@
+"""JSON responses serialized in one pass by pydantic-core.
+
+Returning a ``Response`` skips FastAPI's ``response_model`` handling, which would
+validate the data again and encode it through ``jsonable_encoder`` and ``json.dumps``.
+Use it only for content that already is of the declared type, e.g. rows validated
+in bulk with ``adapter(list[Model]).validate_python``.
+"""
+
+from functools import cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@cache
+def adapter(tp: Any) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def json_response(tp: Any, content: Any, headers: dict[str, str] | None = None) -> Response:
+    return Response(adapter(tp).dump_json(content), media_type="application/json", headers=headers)
@@ -2,9 +2,12 @@
 
 from fastapi import APIRouter
 
+from .calendar import router as calendar_router
 from .events import router as events_router
+from .exports import router as exports_router
 from .intentions import router as intentions_router
 from .payments import router as payment_router
+from .status import router as status_router
 from .users import router as users_router
 from .visits import router as visits_router
 from .weekly_events import router as weekly_events_router
@@ -16,5 +19,8 @@ api_router.include_router(users_router)
 api_router.include_router(intentions_router)
 api_router.include_router(visits_router)
 api_router.include_router(payment_router)
+api_router.include_router(exports_router)
+api_router.include_router(calendar_router)
+api_router.include_router(status_router)
 
 __all__ = ["api_router"]
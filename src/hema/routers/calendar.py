@@ -0,0 +1,54 @@
+"""Subscribable iCalendar feed."""
+
+from datetime import UTC, date, datetime, timedelta
+
+import sqlalchemy as sa
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+
+from hema.auth import UserIdDep, create_feed_token, feed_user_id
+from hema.conditional import etag, not_modified, table_versions, validator_headers
+from hema.config import settings
+from hema.db import ReadSessionDep
+from hema.models import UserModel
+from hema.monitoring import query_budget
+from hema.schemas.calendar import CalendarFeedSchema
+from hema.services.calendar_service import FEED_TABLES, CalendarService
+
+router = APIRouter(tags=["Calendar"])
+
+
+@router.get("/calendar.ics", response_class=Response, dependencies=[Depends(query_budget(3))])
+async def calendar_feed(
+    request: Request,
+    session: ReadSessionDep,
+    trainer_id: int | None = Query(default=None),
+    token: str | None = Query(default=None),
+):
+    """All events, one trainer's events, or (with a feed ``token``) the user's sign-ups."""
+    user_id = await feed_user_id(token, session) if token else None
+    since = date.today() - timedelta(days=settings.CALENDAR_PAST_DAYS)
+
+    versions, last_modified = await table_versions(session, FEED_TABLES)
+    # The feed window moves daily, so the date is part of the validator
+    tag = etag(since.isoformat(), *versions)
+    headers = validator_headers(tag, last_modified)
+    if not_modified(request, tag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = await CalendarService(session).feed(
+        since,
+        stamp=last_modified or datetime.now(UTC),
+        trainer_id=trainer_id,
+        user_id=user_id,
+    )
+    return Response(body, media_type="text/calendar; charset=utf-8", headers=headers)
+
+
+@router.get("/calendar/token", response_model=CalendarFeedSchema)
+async def calendar_token(
+    session: ReadSessionDep,
+    user_id: UserIdDep,
+):
+    q = sa.select(UserModel.token_version).where(UserModel.id == user_id)
+    token = create_feed_token(user_id, await session.scalar(q))
+    return CalendarFeedSchema(token=token, path=f"/api/calendar.ics?token={token}")
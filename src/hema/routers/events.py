@@ -1,31 +1,72 @@
 """API routes for Event management."""
 
 from datetime import date
+from typing import Annotated
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from hema.auth import TrainerIdDep
-from hema.db import SessionDep
+from hema.auth import TrainerIdDep, oauth2_scheme
+from hema.cache import event_cache
+from hema.conditional import conditional
+from hema.db import ReadSessionDep, SessionDep, db
+from hema.monitoring import query_budget
+from hema.responses import json_response
 from hema.schemas.events import EventCreateSchema, EventResponse
 from hema.services.event import EventService
 
 router = APIRouter(prefix="/events", tags=["Events"])
 
 
-@router.get("", response_model=list[EventResponse])
+def event_tables(request: Request) -> list[str]:
+    tables = ["events", "weekly_events", "users"]
+    if "stats" in request.query_params:
+        tables += ["intentions", "visits"]
+    return tables
+
+
+EventsValidatorsDep = Annotated[dict[str, str], Depends(conditional(event_tables))]
+
+
+async def stats_user_id(
+    request: Request,
+    session: Annotated[AsyncSession, Depends(db.get_primary_read_db)],
+    stats: bool = Query(default=False),
+) -> int | None:
+    # Only stats carry per-user fields (my_intention); the cached week needs no auth query
+    if not stats:
+        return None
+    return await oauth2_scheme.optional(request, session)
+
+
+@router.get("", response_model=list[EventResponse], dependencies=[Depends(query_budget(4))])
 async def list_events(
-    session: SessionDep,
+    session: ReadSessionDep,
+    user_id: Annotated[int | None, Depends(stats_user_id)],
+    validators: EventsValidatorsDep,
     start: date = Query(default_factory=date.today),
     end: date = Query(default_factory=date.today),
+    expand: bool = Query(default=False),
+    stats: bool = Query(default=False),
 ):
     service = EventService(session)
-    return await service.list_events(start, end)
+    if stats:
+        events = await service.list_events(start, end, expand=expand, stats=True, user_id=user_id)
+        return json_response(list[EventResponse], events, headers=validators)
+    # Already serialized from the week cache, so skip response_model validation
+    body = await service.list_events_json(start, end, expand=expand)
+    return Response(body, media_type="application/json", headers=validators)
+
+
+@router.get("/cache", include_in_schema=False)
+async def events_cache_stats(_: TrainerIdDep):
+    return event_cache.stats()
 
 
-@router.get("/{event_id}", response_model=EventResponse)
+@router.get("/{event_id}", response_model=EventResponse, dependencies=[Depends(query_budget(1))])
 async def get_event(
     event_id: int,
-    session: SessionDep,
+    session: ReadSessionDep,
 ):
     service = EventService(session)
     event_response = await service.by_id(event_id)
@@ -38,7 +79,7 @@ async def get_event(
     return event_response
 
 
-@router.post("", response_model=EventResponse)
+@router.post("", response_model=EventResponse, dependencies=[Depends(query_budget(3))])
 async def create_event(
     event_data: EventCreateSchema,
     session: SessionDep,
@@ -51,7 +92,26 @@ async def create_event(
     return event
 
 
-@router.post("/take/{event_id}", response_model=EventResponse)
+@router.post("/weekly/{weekly_id}/{day}", response_model=EventResponse)
+async def materialize_occurrence(
+    weekly_id: int,
+    day: date,
+    session: SessionDep,
+    _: TrainerIdDep,
+):
+    service = EventService(session)
+    event_id = await service.materialize(weekly_id, day)
+    if event_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"WeeklyEvent {weekly_id} has no occurrence on {day}",
+        )
+    return await service.by_id(event_id)
+
+
+@router.post(
+    "/take/{event_id}", response_model=EventResponse, dependencies=[Depends(query_budget(3))]
+)
 async def take_event(
     event_id: int,
     session: SessionDep,
@@ -60,5 +120,9 @@ async def take_event(
     service = EventService(session)
 
     event_response = await service.set_trainer(event_id, user_id)
+    if not event_response:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Event {event_id} not found"
+        )
 
     return event_response
@@ -0,0 +1,68 @@
+"""Trainer-only spreadsheet exports streamed straight from the database."""
+
+from collections.abc import Callable
+from datetime import date
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from hema.auth import TrainerIdDep
+from hema.db import db
+from hema.exports import csv_chunks, xlsx_chunks
+from hema.schemas.exports import ExportFormat
+from hema.services.export_service import ExportService
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def export_response(
+    name: str, start: date, end: date, fmt: ExportFormat, source: Callable
+) -> StreamingResponse:
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end"
+        )
+
+    async def body():
+        # The request session is closed before the body is sent, so the cursor gets its own
+        async with db.context() as session:
+            header, rows = source(ExportService(session))(start, end)
+            chunks = (
+                csv_chunks(header, rows)
+                if fmt == ExportFormat.CSV
+                else xlsx_chunks(header, rows, sheet=name)
+            )
+            async for chunk in chunks:
+                yield chunk
+
+    filename = f"{name}_{start}_{end}.{fmt.value}"
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/visits")
+async def export_visits(
+    _: TrainerIdDep,
+    start: date = Query(),
+    end: date = Query(default_factory=date.today),
+    fmt: ExportFormat = Query(default=ExportFormat.CSV, alias="format"),
+):
+    return export_response("visits", start, end, fmt, lambda s: s.visits)
+
+
+@router.get("/payments")
+async def export_payments(
+    _: TrainerIdDep,
+    start: date = Query(),
+    end: date = Query(default_factory=date.today),
+    fmt: ExportFormat = Query(default=ExportFormat.CSV, alias="format"),
+):
+    return export_response("payments", start, end, fmt, lambda s: s.payments)
@@ -1,21 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from hema.auth import oauth2_scheme
-from hema.db import SessionDep
+from hema.conditional import conditional
+from hema.db import ReadSessionDep, SessionDep
+from hema.monitoring import query_budget
 from hema.schemas.intentions import IntentionCreate, IntentionResponse
+from hema.services.event import EventService
 from hema.services.intention_service import IntentionService
 
 router = APIRouter(prefix="/intentions", tags=["Intentions"])
 
 
-@router.post("", response_model=IntentionResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "",
+    response_model=IntentionResponse,
+    status_code=status.HTTP_201_CREATED,
+    # Auth and insert; plus storing the occurrence and its cache NOTIFY for weekly_id + date
+    dependencies=[Depends(query_budget(4))],
+)
 async def create_intention(
     data: IntentionCreate,
     session: SessionDep,
     user_id: int = Depends(oauth2_scheme),
 ):
+    event_id = await EventService(session).resolve_event_id(data)
+    if event_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+
     service = IntentionService(session)
-    result = await service.create(user_id, data.event_id)
+    result = await service.create(user_id, event_id)
     if not result:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -39,19 +52,22 @@ async def delete_intention(
         )
 
 
-@router.get("/event/{event_id}")
+@router.get(
+    "/event/{event_id}",
+    dependencies=[Depends(query_budget(2)), Depends(conditional(["intentions", "users"]))],
+)
 async def get_event_attendees(
     event_id: int,
-    session: SessionDep,
+    session: ReadSessionDep,
 ):
     service = IntentionService(session)
     return await service.get_for_event(event_id)
 
 
-@router.get("/me/{event_id}")
+@router.get("/me/{event_id}", dependencies=[Depends(query_budget(2))])
 async def check_my_intention(
     event_id: int,
-    session: SessionDep,
+    session: ReadSessionDep,
     user_id: int = Depends(oauth2_scheme),
 ):
     service = IntentionService(session)
@@ -1,21 +1,25 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.exc import IntegrityError
 
 from hema.auth import TrainerIdDep, UserIdDep
-from hema.db import SessionDep
+from hema.db import ReadSessionDep, SessionDep
+from hema.monitoring import query_budget
+from hema.pagination import CursorDep, paginate
 from hema.schemas.payments import (
+    BalanceSort,
     PaymentResponseSchema,
     PaymentSchema,
+    UserBalanceResponseSchema,
 )
 from hema.services.payment_service import PaymentService
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
 
-@router.get("/balance", response_model=int)
+@router.get("/balance", response_model=int, dependencies=[Depends(query_budget(2))])
 async def get_user_balance(
     user_id: UserIdDep,
-    session: SessionDep,
+    session: ReadSessionDep,
 ):
     service = PaymentService(session)
     try:
@@ -27,6 +31,23 @@ async def get_user_balance(
     return db_data
 
 
+@router.get(
+    "/balances",
+    response_model=list[UserBalanceResponseSchema],
+    dependencies=[Depends(query_budget(2))],
+)
+async def list_user_balances(
+    session: ReadSessionDep,
+    _: TrainerIdDep,
+    sort: BalanceSort = Query(default=BalanceSort.BALANCE),
+    debtors: bool = Query(default=False),
+    limit: int = Query(default=100, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+):
+    service = PaymentService(session)
+    return await service.list_balances(sort=sort, debtors_only=debtors, limit=limit, offset=offset)
+
+
 @router.post("/balance", response_model=PaymentResponseSchema)
 async def update_user_balance(
     data: PaymentSchema,
@@ -62,11 +83,18 @@ async def delete_user_payment(
     return delete_payment
 
 
-@router.get("/payment_history", response_model=list[PaymentResponseSchema])
+@router.get(
+    "/payment_history",
+    response_model=list[PaymentResponseSchema],
+    dependencies=[Depends(query_budget(2))],
+)
 async def get_user_payment_history(
     user_id: UserIdDep,
-    session: SessionDep,
+    session: ReadSessionDep,
+    response: Response,
+    after: CursorDep,
+    limit: int = Query(default=100, ge=1, le=500),
 ) -> list:
     service = PaymentService(session)
-    history = await service.get_user_payment_history(user_id=user_id)
-    return history
+    history = await service.get_user_payment_history(user_id=user_id, limit=limit + 1, after=after)
+    return paginate(history, limit, response, key="id")
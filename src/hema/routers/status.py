@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+
+from hema.auth import TrainerIdDep
+from hema.db import db
+from hema.slow_queries import SlowQuery, slow_queries
+
+router = APIRouter(prefix="/status", tags=["Status"], include_in_schema=False)
+
+
+@router.get("/pool")
+async def pool_stats(_: TrainerIdDep):
+    return db.pool_stats()
+
+
+@router.get("/slow-queries", response_model=list[SlowQuery])
+async def slow_query_log(_: TrainerIdDep):
+    """Newest first; empty unless ``SQL_SLOW_MS`` is set."""
+    return list(reversed(slow_queries.entries))
@@ -5,7 +5,9 @@ from fastapi.responses import Response
 from fastapi.security import OAuth2PasswordRequestForm
 
 from hema.auth import UserIdDep, create_jwt_token, oauth2_scheme, verify_password
-from hema.db import SessionDep
+from hema.conditional import conditional
+from hema.db import ReadSessionDep, SessionDep
+from hema.monitoring import query_budget
 from hema.schemas.users import (
     AuthResponseModel,
     UserCreateSchema,
@@ -31,10 +33,12 @@ async def user_registration(
     return new_user
 
 
-@router.get("/me", response_model=UserResponseSchema)
+@router.get("/me", response_model=UserResponseSchema, dependencies=[Depends(query_budget(3))])
 async def get_user_profile(
     user_id: UserIdDep,
-    session: SessionDep,
+    session: ReadSessionDep,
+    # After UserIdDep so that revoked or expired tokens never get a 304
+    _: dict = Depends(conditional(["users", "trainers"])),
 ):
     service = UserService(session)
     user_profile = await service.get_by_id(user_id)
@@ -67,11 +71,15 @@ async def user_loggin_in(
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    password_check = verify_password(data.password, user["password"])
+    password_check = await verify_password(data.password, user["password"])
     if not password_check:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Password are invalid")
 
-    token_payload = {"user_id": user["id"]}
+    token_payload = {
+        "user_id": user["id"],
+        "is_trainer": user["is_trainer"],
+        "ver": user["token_version"],
+    }
     token = create_jwt_token(data=token_payload)
     return {"access_token": token, "token_type": "bearer"}
 
@@ -79,7 +87,7 @@ async def user_loggin_in(
 @router.get("/qr")
 async def get_qr(
     user_id: UserIdDep,
-    session: SessionDep,
+    session: ReadSessionDep,
 ):
     service = UserService(session)
     qr = service.qr_gen(user_id=user_id)
@@ -93,7 +101,7 @@ async def get_qr(
 )
 async def get_user(
     user_id: int,
-    session: SessionDep,
+    session: ReadSessionDep,
 ):
     user = await UserService(session).get_by_id(user_id)
     if not user:
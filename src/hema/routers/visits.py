@@ -1,36 +1,87 @@
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.exc import IntegrityError
 
 from hema.auth import TrainerIdDep, UserIdDep
-from hema.db import SessionDep
-from hema.schemas.visits import VisitMarkPostSchema, VisitResponse
+from hema.db import ReadSessionDep, SessionDep
+from hema.monitoring import query_budget
+from hema.pagination import CursorDep, paginate
+from hema.schemas.visits import (
+    VisitBatchResult,
+    VisitBatchSchema,
+    VisitBatchStatus,
+    VisitMarkPostSchema,
+    VisitResponse,
+)
+from hema.services.event import EventService
 from hema.services.visit_service import VisitService
 
 router = APIRouter(prefix="/visits", tags=["Visits"])
 
 
-@router.get("/me", response_model=list[VisitResponse])
+@router.get("/me", response_model=list[VisitResponse], dependencies=[Depends(query_budget(2))])
 async def get_my_visits(
-    session: SessionDep,
+    session: ReadSessionDep,
     user_id: UserIdDep,
-    limit: int = Query(default=50, le=100),
-    offset: int = Query(default=0, ge=0),
+    response: Response,
+    after: CursorDep,
+    limit: int = Query(default=50, ge=1, le=100),
 ):
     service = VisitService(session)
-    return await service.get_user_visits(user_id, limit, offset)
+    visits = await service.get_user_visits(user_id, limit + 1, after)
+    return paginate(visits, limit, response, key="event_id")
 
 
-@router.post("", status_code=status.HTTP_204_NO_CONTENT)
+# Auth, visit, balance; plus storing the occurrence and its cache NOTIFY for weekly_id + date
+@router.post("", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(query_budget(5))])
 async def post_visit(
     data: VisitMarkPostSchema,
     session: SessionDep,
     trainer_id: TrainerIdDep,
 ):
+    event_id = await EventService(session).resolve_event_id(data)
+    if event_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+
     try:
         await VisitService(session).mark_visit(
             user_id=data.user_id,
-            event_id=data.event_id,
+            event_id=event_id,
             trainer_id=trainer_id,
         )
     except IntegrityError:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Already marked")
+
+
+@router.post("/batch", response_model=list[VisitBatchResult])
+async def post_visits_batch(
+    data: VisitBatchSchema,
+    session: SessionDep,
+    trainer_id: TrainerIdDep,
+):
+    # Items address events like POST /visits; each weekly occurrence is stored once
+    events = EventService(session)
+    resolved: dict[tuple, int | None] = {}
+    for item in data.items:
+        ref = (item.event_id, item.weekly_id, item.date)
+        if ref not in resolved:
+            resolved[ref] = await events.resolve_event_id(item)
+    event_ids = [resolved[(item.event_id, item.weekly_id, item.date)] for item in data.items]
+
+    marked = iter(
+        await VisitService(session).mark_visits(
+            [
+                (item.user_id, event_id)
+                for item, event_id in zip(data.items, event_ids, strict=True)
+                if event_id is not None
+            ],
+            trainer_id=trainer_id,
+        )
+    )
+    return [
+        VisitBatchResult(
+            **item.model_dump(exclude={"event_id"}),
+            event_id=event_id,
+            status=VisitBatchStatus.UNKNOWN_EVENT if event_id is None else next(marked)[2],
+        )
+        for item, event_id in zip(data.items, event_ids, strict=True)
+    ]
@@ -3,7 +3,10 @@ from datetime import date
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from hema.auth import oauth2_scheme
-from hema.db import SessionDep
+from hema.conditional import conditional
+from hema.db import ReadSessionDep, SessionDep
+from hema.monitoring import query_budget
+from hema.responses import json_response
 from hema.schemas.weekly_events import (
     WeeklyEventCreate,
     WeeklyEventResponse,
@@ -14,20 +17,21 @@ from hema.services.weekly_event_service import WeeklyEventService
 router = APIRouter(prefix="/weekly", tags=["Weekly Events"])
 
 
-@router.get("", response_model=list[WeeklyEventResponse])
+@router.get("", response_model=list[WeeklyEventResponse], dependencies=[Depends(query_budget(2))])
 async def list_weekly_events(
-    session: SessionDep,
+    session: ReadSessionDep,
     start: date | None = Query(default=None),
     end: date | None = Query(default=None),
+    validators: dict = Depends(conditional(["weekly_events"])),
 ):
     weekly_events = await WeeklyEventService(session).list_weekly_events(start, end)
-    return [WeeklyEventResponse.model_validate(we) for we in weekly_events]
+    return json_response(list[WeeklyEventResponse], weekly_events, headers=validators)
 
 
 @router.get("/{weekly_event_id}", response_model=WeeklyEventResponse)
 async def get_weekly_event(
     weekly_event_id: int,
-    session: SessionDep,
+    session: ReadSessionDep,
 ):
     weekly_event = await WeeklyEventService(session).get_weekly_event(weekly_event_id)
     if not weekly_event:
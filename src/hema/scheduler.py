@@ -0,0 +1,64 @@
+"""Background upkeep of generated weekly events."""
+
+import asyncio
+import contextlib
+import logging
+
+import sqlalchemy as sa
+
+from hema.config import settings
+from hema.db import db
+from hema.services.weekly_event_service import WeeklyEventService, events_horizon
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_try_advisory_xact_lock
+EVENTS_SYNC_LOCK = 0x48454D41
+
+
+class EventHorizonScheduler:
+    """Periodically extends generated events up to the rolling horizon.
+
+    Runs as a background task so startup does not wait for it. Every worker runs the
+    loop, but a transaction-scoped advisory lock lets only one of them do the work.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def run_once(self) -> int | None:
+        """Sync events once; returns ``None`` if another worker holds the lock."""
+        async with db.context() as session:
+            locked = await session.scalar(
+                sa.select(sa.func.pg_try_advisory_xact_lock(EVENTS_SYNC_LOCK))
+            )
+            if not locked:
+                return None
+            return await WeeklyEventService(session).sync_future_events(events_horizon())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                created = await self.run_once()
+            except Exception:
+                logger.exception("Weekly events sync failed")
+            else:
+                if created is not None:
+                    logger.info("Weekly events synced, %d created", created)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="events-horizon")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+
+scheduler = EventHorizonScheduler(settings.EVENTS_SYNC_INTERVAL_SECONDS)
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class CalendarFeedSchema(BaseModel):
+    token: str
+    path: str
@@ -1,5 +1,6 @@
 """Pydantic schemas for Event API models."""
 
+import datetime as dt
 from datetime import date, time
 
 from pydantic import BaseModel, ConfigDict, model_validator
@@ -21,10 +22,17 @@ class EventBase(BaseModel):
 
 
 class EventResponse(EventBase):
-    """Event response schema with ID."""
+    """Event response schema with ID.
 
-    id: int
+    ``id`` is ``None`` for weekly occurrences that have not been stored yet.
+    The counters and ``my_intention`` are only filled when requested with ``stats``.
+    """
+
+    id: int | None
     trainer_name: str | None = None
+    intention_count: int | None = None
+    visit_count: int | None = None
+    my_intention: bool | None = None
 
 
 class EventCreateSchema(BaseModel):
@@ -44,3 +52,17 @@ class EventCreateSchema(BaseModel):
         if values.time_start >= values.time_end:
             raise ValueError("time_start must be before time_end")
         return values
+
+
+class OccurrenceRefSchema(BaseModel):
+    """Reference to a stored event, or to a weekly occurrence by template and date."""
+
+    event_id: int | None = None
+    weekly_id: int | None = None
+    date: dt.date | None = None
+
+    @model_validator(mode="after")
+    def validate_ref(cls, values):
+        if values.event_id is None and (values.weekly_id is None or values.date is None):
+            raise ValueError("event_id or both weekly_id and date are required")
+        return values
@@ -0,0 +1,6 @@
+from enum import StrEnum
+
+
+class ExportFormat(StrEnum):
+    CSV = "csv"
+    XLSX = "xlsx"
@@ -1,9 +1,9 @@
 from pydantic import BaseModel, ConfigDict
 
+from hema.schemas.events import OccurrenceRefSchema
 
-class IntentionCreate(BaseModel):
-    event_id: int
 
+class IntentionCreate(OccurrenceRefSchema):
     model_config = ConfigDict(extra="forbid")
 
 
@@ -1,4 +1,5 @@
 from datetime import datetime
+from enum import StrEnum
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -17,3 +18,17 @@ class PaymentResponseSchema(PaymentSchema):
     trainer_id: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class BalanceSort(StrEnum):
+    BALANCE = "balance"
+    NAME = "name"
+
+
+class UserBalanceResponseSchema(BaseModel):
+    user_id: int
+    username: str
+    name: str | None = None
+    balance: int
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,6 +1,9 @@
 from datetime import datetime
+from enum import StrEnum
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
+
+from hema.schemas.events import OccurrenceRefSchema
 
 
 class VisitResponse(BaseModel):
@@ -13,6 +16,26 @@ class VisitResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
-class VisitMarkPostSchema(BaseModel):
+class VisitMarkPostSchema(OccurrenceRefSchema):
+    user_id: int
+
+
+class VisitBatchItem(OccurrenceRefSchema):
     user_id: int
-    event_id: int
+
+
+class VisitBatchSchema(BaseModel):
+    items: list[VisitBatchItem] = Field(min_length=1, max_length=500)
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class VisitBatchStatus(StrEnum):
+    INSERTED = "inserted"
+    DUPLICATE = "duplicate"
+    UNKNOWN_USER = "unknown_user"
+    UNKNOWN_EVENT = "unknown_event"
+
+
+class VisitBatchResult(VisitBatchItem):
+    status: VisitBatchStatus
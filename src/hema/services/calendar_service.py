@@ -0,0 +1,103 @@
+from collections import defaultdict
+from datetime import date, datetime
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from hema.config import settings
+from hema.ical import Calendar
+from hema.models import EventModel, IntentionModel, WeeklyEventModel
+from hema.services.weekly_event_service import weekly_dates
+
+# Tables whose changes can alter a feed; their versions make up the ETag
+FEED_TABLES = ("events", "weekly_events", "intentions")
+
+
+class CalendarService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def feed(
+        self,
+        since: date,
+        stamp: datetime,
+        trainer_id: int | None = None,
+        user_id: int | None = None,
+    ) -> str:
+        """Render events from ``since`` on as iCalendar.
+
+        Each weekly template becomes one recurring VEVENT. Stored occurrences that no
+        longer match their template (renamed, moved, taken by another trainer) are
+        excluded from the series with EXDATE and emitted on their own, like one-off
+        events. The per-user feed lists only events the user signed up for.
+        """
+        calendar = Calendar(settings.CALENDAR_TIMEZONE, stamp)
+        if user_id is not None:
+            q = (
+                sa.select(EventModel)
+                .join(IntentionModel, IntentionModel.event_id == EventModel.id)
+                .where(IntentionModel.user_id == user_id, EventModel.date >= since)
+                .order_by(EventModel.date, EventModel.time_start)
+            )
+            for event in (await self.db.scalars(q)).all():
+                self._single(calendar, event)
+            return calendar.render()
+
+        templates = sa.select(WeeklyEventModel).where(WeeklyEventModel.end >= since)
+        if trainer_id is not None:
+            templates = templates.where(WeeklyEventModel.trainer_id == trainer_id)
+
+        exdates: dict[int, list[date]] = defaultdict(list)
+        for event, override in (await self.db.execute(self._stored(since))).tuples():
+            if override and event.weekly_id is not None:
+                exdates[event.weekly_id].append(event.date)
+            if override and (trainer_id is None or event.trainer_id == trainer_id):
+                self._single(calendar, event)
+
+        for template in (await self.db.scalars(templates)).all():
+            first = next(
+                weekly_dates(max(template.start, since), template.end, template.weekday), None
+            )
+            if first is None:
+                continue
+            calendar.weekly(
+                f"hema-weekly-{template.id}@hema",
+                template.name,
+                first,
+                template.end,
+                template.time_start,
+                template.time_end,
+                exdates=exdates[template.id],
+            )
+        return calendar.render()
+
+    @staticmethod
+    def _stored(since: date) -> sa.Select:
+        """Stored events with a flag telling whether a weekly series does not cover them."""
+        template = WeeklyEventModel
+        override = sa.or_(
+            template.id.is_(None),
+            EventModel.name != template.name,
+            EventModel.time_start != template.time_start,
+            EventModel.time_end != template.time_end,
+            EventModel.trainer_id.is_distinct_from(template.trainer_id),
+            EventModel.date < template.start,
+            EventModel.date > template.end,
+            sa.extract("isodow", EventModel.date) != template.weekday + 1,
+        )
+        return (
+            sa.select(EventModel, override.label("override"))
+            .outerjoin(template, EventModel.weekly_id == template.id)
+            .where(EventModel.date >= since)
+            .order_by(EventModel.date, EventModel.time_start)
+        )
+
+    @staticmethod
+    def _single(calendar: Calendar, event: EventModel) -> None:
+        calendar.event(
+            f"hema-event-{event.id}@hema",
+            event.name,
+            event.date,
+            event.time_start,
+            event.time_end,
+        )
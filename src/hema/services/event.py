@@ -1,11 +1,15 @@
-from datetime import date
+from datetime import date, timedelta
 
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from hema.models import EventModel
+from hema.cache import Week, event_cache, invalidate_events
+from hema.models import EventModel, IntentionModel, VisitModel, WeeklyEventModel
 from hema.models.users import UserModel
-from hema.schemas.events import EventCreateSchema, EventResponse
+from hema.responses import adapter
+from hema.schemas.events import EventCreateSchema, EventResponse, OccurrenceRefSchema
+from hema.services.weekly_event_service import EVENT_COLUMNS, weekly_dates
 
 
 class EventService:
@@ -17,40 +21,216 @@ class EventService:
             UserModel, EventModel.trainer_id == UserModel.id
         )
 
-    async def by_id(self, event_id: int) -> EventResponse:
+    async def by_id(self, event_id: int) -> EventResponse | None:
         q = self._with_trainer().where(EventModel.id == event_id)
+        return await self._one(q)
+
+    async def _one(self, q: sa.Select) -> EventResponse | None:
         r = (await self.session.execute(q)).mappings().one_or_none()
-        return EventResponse.model_validate(r)
+        return EventResponse.model_validate(r) if r is not None else None
+
+    @staticmethod
+    def _written(stmt: sa.Insert | sa.Update) -> sa.Select:
+        """Rows returned by ``stmt`` with their trainer's name, read in the same statement."""
+        written = stmt.returning(*EventModel.__table__.c).cte("written")
+        return sa.select(*written.c, UserModel.name.label("trainer_name")).outerjoin(
+            UserModel, written.c.trainer_id == UserModel.id
+        )
 
     async def list_events(
-        self, start: date, end: date, trainer_id: int | None = None
+        self,
+        start: date,
+        end: date,
+        trainer_id: int | None = None,
+        expand: bool = False,
+        stats: bool = False,
+        user_id: int | None = None,
     ) -> list[EventResponse]:
-        q = self._with_trainer().where(EventModel.date >= start).where(EventModel.date <= end)
-        if trainer_id:
+        """List stored events in ``[start, end]``.
+
+        With ``expand``, upcoming occurrences of weekly templates that have no stored
+        row yet are computed on the fly and merged in with ``id=None``.
+        With ``stats``, each event carries its intention and visit counts and, for
+        ``user_id``, whether that user signed up, all from the same range query.
+        """
+        q = (
+            self._with_trainer()
+            .where(EventModel.date >= start)
+            .where(EventModel.date <= end)
+            .order_by(EventModel.date, EventModel.time_start)
+        )
+        if trainer_id and not expand:
             q = q.where(EventModel.trainer_id == trainer_id)
+        if stats:
+            q = q.add_columns(*self._stats_columns(user_id))
 
         r = (await self.session.execute(q)).mappings().all()
-        return list(map(EventResponse.model_validate, r))
+        # One pydantic-core call for the whole list instead of one per row
+        events = adapter(list[EventResponse]).validate_python(r)
+        if not expand:
+            return events
 
-    async def create(self, event_data: EventCreateSchema, user_id: int) -> EventResponse:
+        stored = {(e.weekly_id, e.date) for e in events if e.weekly_id is not None}
+        virtual = [
+            e
+            for e in await self.occurrences(max(start, date.today()), end)
+            if (e.weekly_id, e.date) not in stored
+        ]
+        if stats:
+            # Nobody can sign up for or visit an occurrence that is not stored yet
+            for e in virtual:
+                e.intention_count, e.visit_count, e.my_intention = 0, 0, False
+        events = [e for e in events + virtual if not trainer_id or e.trainer_id == trainer_id]
+        return sorted(events, key=lambda e: (e.date, e.time_start))
+
+    async def list_events_json(self, start: date, end: date, expand: bool = False) -> bytes:
+        """Serialized ``list_events`` result, assembled from cached weeks.
+
+        Missing weeks are loaded with one range query and cached as per-event JSON.
+        """
+        first = start - timedelta(days=start.weekday())
+        weeks = [first + timedelta(weeks=i) for i in range((end - first).days // 7 + 1)]
+        # Expanded weeks depend on the current date, which splits stored from virtual
+        today = date.today() if expand else None
+
+        generation = event_cache.generation
+        cached: dict[date, Week | None] = {
+            week: event_cache.get((week, expand, today)) for week in weeks
+        }
+        missing = [week for week, events in cached.items() if events is None]
+        if missing:
+            loaded: dict[date, Week] = {week: [] for week in missing}
+            events = await self.list_events(
+                missing[0], missing[-1] + timedelta(days=6), expand=expand
+            )
+            for e in events:
+                week = e.date - timedelta(days=e.date.weekday())
+                if week in loaded:
+                    loaded[week].append((e.date, e.model_dump_json().encode()))
+            max_lag = self.session.info.get("max_lag", 0.0)
+            for week, week_events in loaded.items():
+                event_cache.put((week, expand, today), week_events, generation, max_lag)
+            cached.update(loaded)
+
+        return (
+            b"["
+            + b",".join(
+                chunk for week in weeks for day, chunk in cached[week] if start <= day <= end
+            )
+            + b"]"
+        )
+
+    @staticmethod
+    def _stats_columns(user_id: int | None) -> list:
+        intention_count = (
+            sa.select(sa.func.count())
+            .where(IntentionModel.event_id == EventModel.id)
+            .scalar_subquery()
+        )
+        visit_count = (
+            sa.select(sa.func.count()).where(VisitModel.event_id == EventModel.id).scalar_subquery()
+        )
+        my_intention = (
+            sa.exists()
+            .where(IntentionModel.event_id == EventModel.id)
+            .where(IntentionModel.user_id == user_id)
+            if user_id is not None
+            else sa.false()
+        )
+        return [
+            intention_count.label("intention_count"),
+            visit_count.label("visit_count"),
+            my_intention.label("my_intention"),
+        ]
+
+    async def occurrences(self, start: date, end: date) -> list[EventResponse]:
+        """Expand weekly templates into unsaved occurrences in ``[start, end]``."""
         q = (
-            sa.insert(EventModel)
-            .values(
-                {
-                    EventModel.trainer_id.name: user_id,
-                    **event_data.model_dump(),
-                }
+            sa.select(*WeeklyEventModel.__table__.c, UserModel.name.label("trainer_name"))
+            .outerjoin(UserModel, WeeklyEventModel.trainer_id == UserModel.id)
+            .where(WeeklyEventModel.start <= end)
+            .where(WeeklyEventModel.end >= start)
+        )
+        templates = (await self.session.execute(q)).mappings().all()
+
+        return [
+            EventResponse(
+                id=None,
+                name=t["name"],
+                color=t["color"],
+                date=d,
+                time_start=t["time_start"],
+                time_end=t["time_end"],
+                weekly_id=t["id"],
+                trainer_id=t["trainer_id"],
+                trainer_name=t["trainer_name"],
+                price=t["price"],
             )
+            for t in templates
+            for d in weekly_dates(max(t["start"], start), min(t["end"], end), t["weekday"])
+        ]
+
+    async def materialize(self, weekly_id: int, day: date) -> int | None:
+        """Return the id of the event for a weekly occurrence, creating the row if needed.
+
+        Returns ``None`` if the template does not exist or does not occur on ``day``.
+        """
+        sel = sa.select(
+            WeeklyEventModel.name,
+            WeeklyEventModel.color,
+            sa.literal(day, sa.Date),
+            WeeklyEventModel.time_start,
+            WeeklyEventModel.time_end,
+            WeeklyEventModel.id,
+            WeeklyEventModel.trainer_id,
+            WeeklyEventModel.price,
+        ).where(
+            WeeklyEventModel.id == weekly_id,
+            WeeklyEventModel.weekday == day.weekday(),
+            WeeklyEventModel.start <= day,
+            WeeklyEventModel.end >= day,
+        )
+        q = (
+            insert(EventModel)
+            .from_select(EVENT_COLUMNS, sel)
+            .on_conflict_do_nothing(index_elements=[EventModel.weekly_id, EventModel.date])
             .returning(EventModel.id)
         )
         event_id = await self.session.scalar(q)
-        return await self.by_id(event_id)  # type: ignore[arg-type]
+        if event_id is not None:
+            await invalidate_events(self.session)
+            return event_id
+        # Already stored (or not an occurrence). Not a no-op update, which would lock the
+        # row and bump the events version on every call
+        return await self.session.scalar(
+            sa.select(EventModel.id).where(
+                EventModel.weekly_id == weekly_id, EventModel.date == day
+            )
+        )
+
+    async def resolve_event_id(self, ref: OccurrenceRefSchema) -> int | None:
+        if ref.event_id is not None:
+            return ref.event_id
+        return await self.materialize(ref.weekly_id, ref.date)  # type: ignore[arg-type]
+
+    async def create(self, event_data: EventCreateSchema, user_id: int) -> EventResponse:
+        q = sa.insert(EventModel).values(
+            {
+                EventModel.trainer_id.name: user_id,
+                **event_data.model_dump(),
+            }
+        )
+        event = await self._one(self._written(q))
+        await invalidate_events(self.session)
+        return event  # type: ignore[return-value]
 
-    async def set_trainer(self, event_id: int, user_id: int):
+    async def set_trainer(self, event_id: int, user_id: int) -> EventResponse | None:
         q = (
             sa.update(EventModel)
             .where(EventModel.id == event_id)
             .values({EventModel.trainer_id.name: user_id})
         )
-        await self.session.execute(q)
-        return await self.by_id(event_id)
+        event = await self._one(self._written(q))
+        if event is not None:
+            await invalidate_events(self.session)
+        return event
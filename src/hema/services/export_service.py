@@ -0,0 +1,81 @@
+from collections.abc import AsyncIterator, Sequence
+from datetime import date, datetime, time, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from hema.models import EventModel, UserModel, UserPaymentHistory, VisitModel
+
+STREAM_BATCH = 1000
+
+
+def day_range(start: date, end: date) -> tuple[datetime, datetime]:
+    """Half-open timestamp range covering the whole days ``[start, end]``."""
+    return datetime.combine(start, time.min), datetime.combine(end + timedelta(days=1), time.min)
+
+
+class ExportService:
+    """Row sources for spreadsheet exports, read through a server-side cursor."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _stream(self, q: sa.Select) -> AsyncIterator[Sequence]:
+        result = await self.db.stream(q.execution_options(yield_per=STREAM_BATCH))
+        async for row in result:
+            yield tuple(row)
+
+    def visits(self, start: date, end: date) -> tuple[list[str], AsyncIterator[Sequence]]:
+        trainer = aliased(UserModel)
+        since, until = day_range(start, end)
+        q = (
+            sa.select(
+                VisitModel.timestamp,
+                EventModel.date,
+                EventModel.name,
+                VisitModel.user_id,
+                UserModel.username,
+                UserModel.name,
+                trainer.name,
+                VisitModel.price,
+            )
+            .join(EventModel, VisitModel.event_id == EventModel.id)
+            .join(UserModel, VisitModel.user_id == UserModel.id)
+            .outerjoin(trainer, VisitModel.trainer_id == trainer.id)
+            .where(VisitModel.timestamp >= since, VisitModel.timestamp < until)
+            .order_by(VisitModel.timestamp)
+        )
+        header = [
+            "timestamp",
+            "event_date",
+            "event",
+            "user_id",
+            "username",
+            "name",
+            "trainer",
+            "price",
+        ]
+        return header, self._stream(q)
+
+    def payments(self, start: date, end: date) -> tuple[list[str], AsyncIterator[Sequence]]:
+        trainer = aliased(UserModel)
+        since, until = day_range(start, end)
+        q = (
+            sa.select(
+                UserPaymentHistory.id,
+                UserPaymentHistory.timestamp,
+                UserPaymentHistory.user_id,
+                UserModel.username,
+                UserModel.name,
+                UserPaymentHistory.payment,
+                trainer.name,
+                UserPaymentHistory.comment,
+            )
+            .outerjoin(UserModel, UserPaymentHistory.user_id == UserModel.id)
+            .outerjoin(trainer, UserPaymentHistory.trainer_id == trainer.id)
+            .where(UserPaymentHistory.timestamp >= since, UserPaymentHistory.timestamp < until)
+            .order_by(UserPaymentHistory.timestamp, UserPaymentHistory.id)
+        )
+        header = ["id", "timestamp", "user_id", "username", "name", "payment", "trainer", "comment"]
+        return header, self._stream(q)
@@ -1,4 +1,5 @@
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from hema.models.intentions import IntentionModel
@@ -9,17 +10,11 @@ class IntentionService:
         self.db = db
 
     async def create(self, user_id: int, event_id: int) -> dict | None:
-        existing = await self.db.scalar(
-            sa.select(IntentionModel.id)
-            .where(IntentionModel.user_id == user_id)
-            .where(IntentionModel.event_id == event_id)
-        )
-        if existing:
-            return None
-
+        """Sign the user up; ``None`` if they already are."""
         q = (
-            sa.insert(IntentionModel)
+            insert(IntentionModel)
             .values(user_id=user_id, event_id=event_id)
+            .on_conflict_do_nothing(index_elements=["user_id", "event_id"])
             .returning(*IntentionModel.__table__.c)
         )
         return (await self.db.execute(q)).mappings().first()
@@ -1,7 +1,10 @@
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from hema.models import EventModel, UserPaymentHistory, VisitModel
+from hema.models import UserBalanceModel, UserModel, UserPaymentHistory, VisitModel
+from hema.pagination import Cursor
+from hema.schemas.payments import BalanceSort
 
 
 class PaymentService:
@@ -27,31 +30,106 @@ class PaymentService:
             )
             .returning(*UserPaymentHistory.__table__.c)
         )
-        return (await self.db.execute(q)).mappings().first()
+        deposit = (await self.db.execute(q)).mappings().first()
+        await self.change_balance(user_id, payment)
+        return deposit
 
-    async def get_user_payment_history(self, user_id: int) -> list[dict]:
-        q = sa.select(*UserPaymentHistory.__table__.c).where(UserPaymentHistory.user_id == user_id)
+    async def get_user_payment_history(
+        self, user_id: int, limit: int = 100, after: Cursor | None = None
+    ) -> list[dict]:
+        """Newest payments first; ``after`` continues from a ``(timestamp, id)`` key."""
+        q = (
+            sa.select(*UserPaymentHistory.__table__.c)
+            .where(UserPaymentHistory.user_id == user_id)
+            .order_by(UserPaymentHistory.timestamp.desc(), UserPaymentHistory.id.desc())
+            .limit(limit)
+        )
+        if after is not None:
+            q = q.where(sa.tuple_(UserPaymentHistory.timestamp, UserPaymentHistory.id) < after)
         return (await self.db.execute(q)).mappings().all()
 
     async def delete_user_payment(self, payment_id: int) -> bool:
         q = (
             sa.delete(UserPaymentHistory)
             .where(UserPaymentHistory.id == payment_id)
-            .returning(*UserPaymentHistory.id)
+            .returning(UserPaymentHistory.user_id, UserPaymentHistory.payment)
         )
-        return (await self.db.scalar(q)) is not None
+        deleted = (await self.db.execute(q)).first()
+        if deleted is None:
+            return False
 
-    async def get_user_balance(self, user_id: int) -> int:
-        q = sa.select(sa.func.sum(UserPaymentHistory.payment)).where(
-            UserPaymentHistory.user_id == user_id
-        )
-        payments = await self.db.scalar(q)
+        await self.change_balance(deleted.user_id, -(deleted.payment or 0))
+        return True
 
-        q = (
-            sa.select(sa.func.sum(EventModel.price))
-            .join(VisitModel, EventModel.id == VisitModel.event_id)
-            .where(VisitModel.user_id == user_id)
+    async def change_balance(self, user_id: int, delta: int) -> None:
+        """Apply a delta to the user's ledger row in the current transaction."""
+        q = insert(UserBalanceModel).values(
+            {UserBalanceModel.user_id: user_id, UserBalanceModel.balance: delta}
         )
-        debt = await self.db.scalar(q)
+        q = q.on_conflict_do_update(
+            index_elements=[UserBalanceModel.user_id],
+            set_={UserBalanceModel.balance: UserBalanceModel.balance + q.excluded.balance},
+        )
+        await self.db.execute(q)
+
+    async def get_user_balance(self, user_id: int) -> int:
+        q = sa.select(UserBalanceModel.balance).where(UserBalanceModel.user_id == user_id)
+        return (await self.db.scalar(q)) or 0
+
+    async def list_balances(
+        self,
+        sort: BalanceSort = BalanceSort.BALANCE,
+        debtors_only: bool = False,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> list[dict]:
+        balance = sa.func.coalesce(UserBalanceModel.balance, 0)
+        q = sa.select(
+            UserModel.id.label("user_id"),
+            UserModel.username,
+            UserModel.name,
+            balance.label("balance"),
+        ).outerjoin(UserBalanceModel, UserBalanceModel.user_id == UserModel.id)
+        if debtors_only:
+            q = q.where(balance < 0)
 
-        return (payments or 0) - (debt or 0)
+        if sort == BalanceSort.NAME:
+            q = q.order_by(sa.func.coalesce(UserModel.name, UserModel.username), UserModel.id)
+        else:
+            q = q.order_by(balance, UserModel.id)
+
+        q = q.limit(limit).offset(offset)
+        return list((await self.db.execute(q)).mappings().all())
+
+    async def reconcile_balances(self) -> int:
+        """Rebuild every ledger row from payment_history and charged visits."""
+        payments = (
+            sa.select(
+                UserPaymentHistory.user_id,
+                sa.func.sum(UserPaymentHistory.payment).label("total"),
+            )
+            .group_by(UserPaymentHistory.user_id)
+            .subquery()
+        )
+        charges = (
+            sa.select(VisitModel.user_id, sa.func.sum(VisitModel.price).label("total"))
+            .group_by(VisitModel.user_id)
+            .subquery()
+        )
+        sel = (
+            sa.select(
+                UserModel.id,
+                sa.func.coalesce(payments.c.total, 0) - sa.func.coalesce(charges.c.total, 0),
+            )
+            .outerjoin(payments, payments.c.user_id == UserModel.id)
+            .outerjoin(charges, charges.c.user_id == UserModel.id)
+        )
+        q = insert(UserBalanceModel).from_select(
+            [UserBalanceModel.user_id, UserBalanceModel.balance], sel
+        )
+        q = q.on_conflict_do_update(
+            index_elements=[UserBalanceModel.user_id],
+            set_={UserBalanceModel.balance: q.excluded.balance},
+        )
+        result = await self.db.execute(q)
+        return result.rowcount
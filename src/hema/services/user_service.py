@@ -9,6 +9,7 @@ from qrcode.constants import ERROR_CORRECT_H
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from hema.auth import password_hashing
+from hema.cache import invalidate_events
 from hema.models import UserModel
 from hema.models.trainers import TrainerModel
 from hema.schemas.users import UserCreateSchema, UserProfileUpdateShema
@@ -27,7 +28,7 @@ class UserService:
             if await self.db.scalar(q):
                 raise ValueError("Phone number already exists")
         with_password = new_user_data.model_copy(
-            update={"password": password_hashing(new_user_data.password)}
+            update={"password": await password_hashing(new_user_data.password)}
         )
         values = with_password.model_dump(mode="json", exclude_unset=True)
         q = sa.insert(UserModel).values(values).returning(*UserModel.__table__.c)
@@ -42,7 +43,11 @@ class UserService:
         return (await self.db.execute(q)).mappings().first()
 
     async def get_by_username(self, username: str) -> dict | None:
-        q = sa.select(*UserModel.__table__.c).where(UserModel.username == username)
+        q = (
+            sa.select(*UserModel.__table__.c, TrainerModel.id.isnot(None).label("is_trainer"))
+            .outerjoin(TrainerModel, TrainerModel.id == UserModel.id)
+            .where(UserModel.username == username)
+        )
         result = (await self.db.execute(q)).mappings().first()
         return result
 
@@ -53,14 +58,20 @@ class UserService:
         if not data:
             return await self.get_by_id(user_id)
         if "password" in data:
-            data["password"] = password_hashing(data["password"])
+            data["password"] = await password_hashing(data["password"])
+            # Revokes tokens issued with the old password
+            data["token_version"] = UserModel.token_version + 1
         q = (
             sa.update(UserModel)
             .where(UserModel.id == user_id)
             .values(**data)
             .returning(*UserModel.__table__.c)
         )
-        return (await self.db.execute(q)).mappings().first()
+        user = (await self.db.execute(q)).mappings().first()
+        if "name" in data:
+            # Cached events carry the trainer's name
+            await invalidate_events(self.db)
+        return user
 
     @staticmethod
     def qr_gen(user_id: int) -> bytes:
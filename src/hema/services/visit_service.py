@@ -1,16 +1,23 @@
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from hema.exceptions import AlreadyExists
-from hema.models import EventModel, VisitModel
+from hema.models import EventModel, UserBalanceModel, UserModel, VisitModel
+from hema.pagination import Cursor
+from hema.schemas.visits import VisitBatchStatus
+from hema.services.payment_service import PaymentService
 
 
 class VisitService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_user_visits(self, user_id: int, limit: int = 50, offset: int = 0) -> list[dict]:
+    async def get_user_visits(
+        self, user_id: int, limit: int = 50, after: Cursor | None = None
+    ) -> list[dict]:
+        """Newest visits first; ``after`` continues from a ``(timestamp, event_id)`` key."""
         q = (
             sa.select(
                 VisitModel.timestamp,
@@ -21,22 +28,111 @@ class VisitService:
             )
             .outerjoin(EventModel, VisitModel.event_id == EventModel.id)
             .where(VisitModel.user_id == user_id)
-            .order_by(VisitModel.timestamp.desc())
+            .order_by(VisitModel.timestamp.desc(), VisitModel.event_id.desc())
             .limit(limit)
-            .offset(offset)
         )
+        if after is not None:
+            q = q.where(sa.tuple_(VisitModel.timestamp, VisitModel.event_id) < after)
         return list((await self.db.execute(q)).mappings().all())
 
     async def mark_visit(self, user_id: int, event_id: int, trainer_id: int) -> None:
-        q = sa.insert(VisitModel).values(
-            {
-                VisitModel.user_id: user_id,
-                VisitModel.event_id: event_id,
-                VisitModel.trainer_id: trainer_id,
-            }
+        price = sa.select(sa.func.coalesce(EventModel.price, 0)).where(EventModel.id == event_id)
+        q = (
+            sa.insert(VisitModel)
+            .values(
+                {
+                    VisitModel.user_id: user_id,
+                    VisitModel.event_id: event_id,
+                    VisitModel.trainer_id: trainer_id,
+                    VisitModel.price: price.scalar_subquery(),
+                }
+            )
+            .returning(VisitModel.price)
         )
 
         try:
-            await self.db.execute(q)
+            charged = await self.db.scalar(q)
         except IntegrityError:
             raise AlreadyExists()
+
+        await PaymentService(self.db).change_balance(user_id, -charged)
+
+    async def mark_visits(
+        self, pairs: list[tuple[int, int]], trainer_id: int
+    ) -> list[tuple[int, int, VisitBatchStatus]]:
+        """Mark many ``(user_id, event_id)`` visits in a single statement.
+
+        Rows for unknown users or events are skipped and existing visits are left as is;
+        each input pair comes back with its status, in input order. Balances of the
+        users that got a new visit are charged in the same statement.
+        """
+        if not pairs:
+            return []
+        unique = list(dict.fromkeys(pairs))
+        rows = sa.values(
+            sa.column("ord", sa.Integer),
+            sa.column("user_id", sa.Integer),
+            sa.column("event_id", sa.Integer),
+            name="input",
+        ).data([(i, *pair) for i, pair in enumerate(unique)])
+        batch = sa.select(rows).cte("batch")
+
+        ins = (
+            insert(VisitModel)
+            .from_select(
+                [VisitModel.user_id, VisitModel.event_id, VisitModel.trainer_id, VisitModel.price],
+                sa.select(
+                    batch.c.user_id,
+                    batch.c.event_id,
+                    sa.literal(trainer_id, sa.Integer),
+                    sa.func.coalesce(EventModel.price, 0),
+                )
+                .join(UserModel, UserModel.id == batch.c.user_id)
+                .join(EventModel, EventModel.id == batch.c.event_id),
+            )
+            .on_conflict_do_nothing()
+            .returning(VisitModel.user_id, VisitModel.event_id, VisitModel.price)
+            .cte("inserted")
+        )
+
+        charge = insert(UserBalanceModel).from_select(
+            [UserBalanceModel.user_id, UserBalanceModel.balance],
+            sa.select(ins.c.user_id, -sa.func.sum(ins.c.price)).group_by(ins.c.user_id),
+        )
+        charge = charge.on_conflict_do_update(
+            index_elements=[UserBalanceModel.user_id],
+            set_={UserBalanceModel.balance: UserBalanceModel.balance + charge.excluded.balance},
+        ).cte("charged")
+
+        status = sa.case(
+            (ins.c.user_id.is_not(None), VisitBatchStatus.INSERTED.value),
+            (UserModel.id.is_(None), VisitBatchStatus.UNKNOWN_USER.value),
+            (EventModel.id.is_(None), VisitBatchStatus.UNKNOWN_EVENT.value),
+            else_=VisitBatchStatus.DUPLICATE.value,
+        )
+        q = (
+            sa.select(batch.c.user_id, batch.c.event_id, status)
+            .outerjoin(UserModel, UserModel.id == batch.c.user_id)
+            .outerjoin(EventModel, EventModel.id == batch.c.event_id)
+            .outerjoin(
+                ins,
+                sa.and_(ins.c.user_id == batch.c.user_id, ins.c.event_id == batch.c.event_id),
+            )
+            .order_by(batch.c.ord)
+            .add_cte(charge)
+        )
+        statuses = {
+            (user_id, event_id): VisitBatchStatus(s)
+            for user_id, event_id, s in (await self.db.execute(q)).tuples()
+        }
+
+        # Repeated pairs within the batch are reported as duplicates after the first one
+        seen: set[tuple[int, int]] = set()
+        result = []
+        for pair in pairs:
+            s = statuses[pair]
+            if pair in seen and s == VisitBatchStatus.INSERTED:
+                s = VisitBatchStatus.DUPLICATE
+            seen.add(pair)
+            result.append((*pair, s))
+        return result
@@ -1,11 +1,45 @@
+from collections.abc import Iterator, Sequence
 from datetime import date, datetime, timedelta
 
 import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from hema.cache import invalidate_events
+from hema.config import settings
 from hema.models.events import EventModel
+from hema.models.intentions import IntentionModel
+from hema.models.visits import VisitModel
 from hema.models.weekly_events import WeeklyEventModel
-from hema.schemas.weekly_events import WeeklyEventCreate, WeeklyEventUpdate
+from hema.responses import adapter
+from hema.schemas.weekly_events import (
+    WeeklyEventCreate,
+    WeeklyEventResponse,
+    WeeklyEventUpdate,
+)
+
+EVENT_COLUMNS = [
+    "name",
+    "color",
+    "date",
+    "time_start",
+    "time_end",
+    "weekly_id",
+    "trainer_id",
+    "price",
+]
+
+
+def weekly_dates(start: date, end: date, weekday: int) -> Iterator[date]:
+    """Yield every date in ``[start, end]`` that falls on ``weekday`` (0=Monday)."""
+    current = start + timedelta(days=(weekday - start.weekday()) % 7)
+    while current <= end:
+        yield current
+        current += timedelta(weeks=1)
+
+
+def events_horizon() -> date:
+    """Last date up to which weekly templates are materialized into events."""
+    return date.today() + timedelta(weeks=settings.EVENTS_HORIZON_WEEKS)
 
 
 class WeeklyEventService:
@@ -14,7 +48,12 @@ class WeeklyEventService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def generate_events(self, weekly_event_id: int) -> int:
+    async def generate_events(self, weekly_event_id: int, until: date | None = None) -> int:
+        """Generate missing future events for one template up to ``until`` (default: its
+        end), computing dates in Python.
+
+        Portable fallback for :meth:`generate_all_events`.
+        """
         q = sa.select(WeeklyEventModel.start, WeeklyEventModel.end, WeeklyEventModel.weekday).where(
             WeeklyEventModel.id == weekly_event_id
         )
@@ -26,12 +65,10 @@ class WeeklyEventService:
             )
         )
 
-        dates = []
-        current = max(start, date.today())
-        while current <= end:
-            if current.weekday() == weekday and current not in existing:
-                dates.append((current,))
-            current += timedelta(days=1)
+        last = end if until is None else min(end, until)
+        dates = [
+            (d,) for d in weekly_dates(max(start, date.today()), last, weekday) if d not in existing
+        ]
 
         if not dates:
             return 0
@@ -53,32 +90,95 @@ class WeeklyEventService:
             .join(WeeklyEventModel, WeeklyEventModel.id == weekly_event_id)
         )
 
-        result = await self.db.execute(
-            sa.insert(EventModel).from_select(
-                [
-                    "name",
-                    "color",
-                    "date",
-                    "time_start",
-                    "time_end",
-                    "weekly_id",
-                    "trainer_id",
-                    "price",
-                ],
-                sel,
+        result = await self.db.execute(sa.insert(EventModel).from_select(EVENT_COLUMNS, sel))
+        return result.rowcount
+
+    async def generate_all_events(
+        self, weekly_event_ids: Sequence[int] | None = None, until: date | None = None
+    ) -> int:
+        """Generate missing future events for all (or the given) templates in one statement.
+
+        Dates come from ``generate_series`` stepping a week at a time from the first
+        matching weekday; dates that already have an event are skipped by an anti-join.
+        """
+        today = date.today()
+        first = sa.func.greatest(WeeklyEventModel.start, today)
+        # ISODOW is 1=Monday … 7=Sunday, weekday is 0=Monday … 6=Sunday
+        shift = (
+            WeeklyEventModel.weekday - (sa.extract("isodow", first).cast(sa.Integer) - 1) + 7
+        ) % 7
+        last = WeeklyEventModel.end if until is None else sa.func.least(WeeklyEventModel.end, until)
+        series = (
+            sa.func.generate_series(first + shift, last, sa.text("interval '1 week'"))
+            .table_valued("d")
+            .render_derived(name="series")
+            .lateral()
+        )
+        day = series.c.d.cast(sa.Date)
+
+        sel = (
+            sa.select(
+                WeeklyEventModel.name,
+                WeeklyEventModel.color,
+                day,
+                WeeklyEventModel.time_start,
+                WeeklyEventModel.time_end,
+                WeeklyEventModel.id,
+                WeeklyEventModel.trainer_id,
+                WeeklyEventModel.price,
+            )
+            .select_from(WeeklyEventModel.__table__.join(series, sa.true()))
+            .where(WeeklyEventModel.end >= today)
+            .where(
+                ~sa.exists().where(
+                    EventModel.weekly_id == WeeklyEventModel.id,
+                    EventModel.date == day,
+                    # Redundant with the series, but lets the planner range-scan future events
+                    EventModel.date >= today,
+                )
             )
         )
+        if weekly_event_ids is not None:
+            sel = sel.where(WeeklyEventModel.id.in_(weekly_event_ids))
+
+        result = await self.db.execute(sa.insert(EventModel).from_select(EVENT_COLUMNS, sel))
         return result.rowcount
 
-    async def sync_future_events(self) -> int:
-        """Generate missing future events for all active weekly events. Safe to call on startup."""
-        ids = await self.db.scalars(
-            sa.select(WeeklyEventModel.id).where(WeeklyEventModel.end >= datetime.now().date())
+    async def prune_events(self, after: date) -> int:
+        """Delete generated events after ``after`` that nothing refers to yet.
+
+        Occurrences a trainer changed (taken over, repriced, moved) no longer match their
+        template and are kept.
+        """
+        template = WeeklyEventModel
+        q = sa.delete(EventModel).where(
+            EventModel.weekly_id.isnot(None),
+            EventModel.date > after,
+            sa.exists().where(
+                template.id == EventModel.weekly_id,
+                template.trainer_id.is_not_distinct_from(EventModel.trainer_id),
+                template.price == EventModel.price,
+                template.time_start == EventModel.time_start,
+                template.time_end == EventModel.time_end,
+                template.name == EventModel.name,
+            ),
+            ~sa.exists().where(IntentionModel.event_id == EventModel.id),
+            ~sa.exists().where(VisitModel.event_id == EventModel.id),
         )
-        total = 0
-        for weekly_event_id in ids.all():
-            total += await self.generate_events(weekly_event_id)
-        return total
+        result = await self.db.execute(q)
+        return result.rowcount
+
+    async def sync_future_events(self, horizon: date | None = None) -> int:
+        """Keep events generated up to the horizon for all active weekly events.
+
+        Unreferenced events generated beyond the horizon are pruned. Safe to call repeatedly.
+        """
+        horizon = horizon or events_horizon()
+        pruned = await self.prune_events(horizon)
+        created = await self.generate_all_events(until=horizon)
+        if pruned or created:
+            await invalidate_events(self.db)
+        return created
 
     async def create_weekly_event(self, data: WeeklyEventCreate, user_id: int) -> dict:
         weekly_event_id = await self.db.scalar(
@@ -99,7 +199,11 @@ class WeeklyEventService:
             .returning(WeeklyEventModel.id)
         )
 
-        await self.generate_events(weekly_event_id)  # type: ignore[arg-type]
+        await self.generate_all_events(
+            [weekly_event_id],  # type: ignore[list-item]
+            until=events_horizon(),
+        )
+        await invalidate_events(self.db)
 
         return await self.get_weekly_event(weekly_event_id)  # type: ignore[arg-type]
 
@@ -124,7 +228,7 @@ class WeeklyEventService:
                     EventModel.weekly_id == weekly_event_id, EventModel.date > today
                 )
             )
-            await self.generate_events(weekly_event_id)
+            await self.generate_all_events([weekly_event_id], until=events_horizon())
         else:
             we_tbl = WeeklyEventModel.__table__.c
             await self.db.execute(
@@ -139,6 +243,7 @@ class WeeklyEventService:
                 .where(EventModel.weekly_id == weekly_event_id, EventModel.date > today)
                 .where(we_tbl.id == weekly_event_id)
             )
+        await invalidate_events(self.db)
 
         return await self.get_weekly_event(weekly_event_id)
 
@@ -154,6 +259,7 @@ class WeeklyEventService:
         result = await self.db.execute(
             sa.delete(WeeklyEventModel).where(WeeklyEventModel.id == weekly_event_id)
         )
+        await invalidate_events(self.db)
 
         return result.rowcount > 0  # type: ignore[attr-defined]
 
@@ -163,12 +269,13 @@ class WeeklyEventService:
 
     async def list_weekly_events(
         self, start: date | None = None, end: date | None = None
-    ) -> list[WeeklyEventModel]:
-        q = sa.select(WeeklyEventModel).order_by(
+    ) -> list[WeeklyEventResponse]:
+        q = sa.select(*WeeklyEventModel.__table__.c).order_by(
             WeeklyEventModel.weekday, WeeklyEventModel.time_start
         )
         if start is not None:
             q = q.where(WeeklyEventModel.end >= start)
         if end is not None:
             q = q.where(WeeklyEventModel.start <= end)
-        return list((await self.db.execute(q)).scalars().all())
+        rows = (await self.db.execute(q)).mappings().all()
+        return adapter(list[WeeklyEventResponse]).validate_python(rows)
@@ -0,0 +1,135 @@
+"""Opt-in log of slow statements, with sampled ``EXPLAIN (ANALYZE, BUFFERS)`` plans."""
+
+import asyncio
+import logging
+import random
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from functools import partial
+from types import FrameType
+
+import greenlet
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from hema.config import settings
+
+logger = logging.getLogger(__name__)
+
+STARTED = "slow_queries_started"
+
+# Frames in these modules run the query for someone else, so they are not its caller
+PLUMBING = ("hema.db", "hema.monitoring", "hema.slow_queries")
+
+# Password hashes (users INSERT/UPDATE) stay out of a log that trainers can read
+SECRET_PREFIXES = ("$argon2",)
+
+
+@dataclass
+class SlowQuery:
+    at: datetime
+    engine: str
+    statement: str
+    parameters: str
+    seconds: float
+    # Innermost hema function (usually a service method) the statement was run for
+    caller: str | None
+    # Filled in later, for the sampled share of SELECTs
+    plan: str | None = None
+
+
+def _frames(frame: FrameType | None):
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+
+
+def redact(parameters) -> str:
+    if isinstance(parameters, tuple | list):
+        parameters = tuple(
+            "<redacted>" if isinstance(p, str) and p.startswith(SECRET_PREFIXES) else p
+            for p in parameters
+        )
+    return repr(parameters)[:1000]
+
+
+def caller() -> str | None:
+    # The async engine runs the driver in a child greenlet: the awaiting coroutines are on
+    # the stack of the parent greenlet, suspended where it switched over
+    parent = greenlet.getcurrent().parent
+    for frame in (*_frames(sys._getframe(1)), *_frames(parent and parent.gr_frame)):
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("hema.") and not module.startswith(PLUMBING):
+            return f"{module}.{frame.f_code.co_qualname}"
+    return None
+
+
+class SlowQueryLog:
+    """The last ``size`` statements that took ``threshold`` seconds or longer."""
+
+    def __init__(self, threshold: float, size: int, explain_sample: float):
+        self.threshold = threshold
+        self.explain_sample = explain_sample
+        self.entries: deque[SlowQuery] = deque(maxlen=size)
+        self._explaining: set[asyncio.Task] = set()
+
+    def instrument(self, name: str, engine: AsyncEngine) -> None:
+        sa.event.listen(engine.sync_engine, "before_cursor_execute", self._before)
+        sa.event.listen(
+            engine.sync_engine, "after_cursor_execute", partial(self._after, name, engine)
+        )
+
+    @staticmethod
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info[STARTED] = time.perf_counter()
+
+    def _after(
+        self, name, engine, conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        seconds = time.perf_counter() - conn.info.pop(STARTED, time.perf_counter())
+        if seconds < self.threshold:
+            return
+        if context is not None and context.execution_options.get("untracked"):
+            return
+        entry = SlowQuery(
+            at=datetime.now(UTC),
+            engine=name,
+            statement=statement,
+            parameters=redact(parameters),
+            seconds=seconds,
+            caller=caller(),
+        )
+        self.entries.append(entry)
+        logger.warning("Slow query (%.3fs) from %s: %s", seconds, entry.caller, statement)
+
+        # EXPLAIN ANALYZE runs the statement again, so only plain SELECTs, one at a time
+        if (
+            not executemany
+            and not self._explaining
+            and statement.lstrip()[:6].lower() == "select"
+            and random.random() < self.explain_sample
+        ):
+            task = asyncio.get_running_loop().create_task(self._explain(engine, entry, parameters))
+            self._explaining.add(task)
+            task.add_done_callback(self._explaining.discard)
+
+    @staticmethod
+    async def _explain(engine: AsyncEngine, entry: SlowQuery, parameters) -> None:
+        try:
+            # A connection of its own, whose transaction is rolled back on leaving
+            async with engine.connect() as connection:
+                connection = await connection.execution_options(untracked=True)
+                result = await connection.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {entry.statement}", parameters
+                )
+                entry.plan = "\n".join(row[0] for row in result)
+        except Exception:
+            logger.warning("Could not explain slow query from %s", entry.caller, exc_info=True)
+
+
+slow_queries = SlowQueryLog(
+    settings.SQL_SLOW_MS / 1000, settings.SQL_SLOW_LOG_SIZE, settings.SQL_SLOW_EXPLAIN_SAMPLE
+)
@@ -0,0 +1,19 @@
+"""Pytest plugin, enabled with ``pytest_plugins = ["hema.testing"]`` in a conftest."""
+
+import pytest
+
+from hema import monitoring
+
+
+@pytest.fixture(autouse=True)
+def sql_problems():
+    """Fail the test if a request it made went over its route's ``query_budget``.
+
+    Set ``SQL_REPEAT_WARNING`` to also fail on statements repeated within one request.
+    """
+    problems: list[str] = []
+    monitoring.problem_listeners.append(problems.append)
+    yield problems
+    monitoring.problem_listeners.remove(problems.append)
+    if problems:
+        pytest.fail("\n".join(problems), pytrace=False)
@@ -0,0 +1,120 @@
+"""Tests run against the database at ``DB_URI`` (a local Postgres with migrations applied).
+
+Service tests get a session whose transaction is rolled back; API tests commit through
+the app and remove what the ``club`` fixture created afterwards.
+"""
+
+import os
+import uuid
+from datetime import date, time, timedelta
+
+import httpx
+import pytest
+import sqlalchemy as sa
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key-that-is-long-enough-for-hs256")
+
+from hema.auth import create_jwt_token
+from hema.db import db
+from hema.main import api
+from hema.models import (
+    EventModel,
+    IntentionModel,
+    TrainerModel,
+    UserModel,
+    VisitModel,
+    WeeklyEventModel,
+)
+
+pytest_plugins = ["hema.testing"]
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def session():
+    async with db.async_session() as session:
+        await session.begin()
+        try:
+            yield session
+        finally:
+            await session.rollback()
+    # Every test runs in a new event loop, pooled connections belong to the old one
+    await db.engine.dispose()
+
+
+@pytest.fixture
+async def client():
+    transport = httpx.ASGITransport(app=api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    await db.engine.dispose()
+
+
+def bearer(user_id: int, is_trainer: bool, version: int = 0) -> dict:
+    token = create_jwt_token({"user_id": user_id, "is_trainer": is_trainer, "ver": version})
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def add_user(session, trainer: bool = False) -> int:
+    user_id = await session.scalar(
+        sa.insert(UserModel)
+        .values(username=f"test-{uuid.uuid4().hex[:12]}", password="x")
+        .returning(UserModel.id)
+    )
+    if trainer:
+        await session.execute(sa.insert(TrainerModel).values(id=user_id))
+    return user_id
+
+
+async def add_template(session, trainer_id: int, weeks: int = 8) -> int:
+    first = date.today() + timedelta(days=1)
+    return await session.scalar(
+        sa.insert(WeeklyEventModel)
+        .values(
+            start=first,
+            end=first + timedelta(weeks=weeks),
+            name="Test class",
+            weekday=first.weekday(),
+            time_start=time(18),
+            time_end=time(20),
+            trainer_id=trainer_id,
+            price=10,
+        )
+        .returning(WeeklyEventModel.id)
+    )
+
+
+@pytest.fixture
+async def club():
+    """A trainer, a member and a weekly template starting tomorrow, committed."""
+    async with db.context() as session:
+        trainer_id = await add_user(session, trainer=True)
+        member_id = await add_user(session)
+        weekly_id = await add_template(session, trainer_id)
+        # Granting the trainer role bumps token_version
+        q = sa.select(UserModel.id, UserModel.token_version).where(
+            UserModel.id.in_([trainer_id, member_id])
+        )
+        versions = dict((await session.execute(q)).all())
+    yield {
+        "trainer_id": trainer_id,
+        "member_id": member_id,
+        "weekly_id": weekly_id,
+        "first": date.today() + timedelta(days=1),
+        "trainer": bearer(trainer_id, True, versions[trainer_id]),
+        "member": bearer(member_id, False, versions[member_id]),
+    }
+    users = [trainer_id, member_id]
+    events = sa.select(EventModel.id).where(EventModel.weekly_id == weekly_id)
+    async with db.context() as session:
+        await session.execute(sa.delete(VisitModel).where(VisitModel.event_id.in_(events)))
+        await session.execute(sa.delete(IntentionModel).where(IntentionModel.user_id.in_(users)))
+        await session.execute(sa.delete(EventModel).where(EventModel.weekly_id == weekly_id))
+        await session.execute(sa.delete(WeeklyEventModel).where(WeeklyEventModel.id == weekly_id))
+        await session.execute(sa.delete(TrainerModel).where(TrainerModel.id == trainer_id))
+        await session.execute(sa.delete(UserModel).where(UserModel.id.in_(users)))
+    await db.engine.dispose()
@@ -0,0 +1,15 @@
+import pytest
+
+from hema.db import db
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_busy_response_carries_cors_headers(client, monkeypatch):
+    monkeypatch.setattr(db, "admit", lambda max_waiting: False)
+
+    response = await client.get("/api/events", headers={"Origin": "http://localhost:5173"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+    assert response.headers["Access-Control-Allow-Origin"] == "http://localhost:5173"
@@ -0,0 +1,15 @@
+import pytest
+
+from hema.auth import create_feed_token
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_feed_token_is_not_a_bearer_token(client, club):
+    headers = {"Authorization": f"Bearer {create_feed_token(club['member_id'], 0)}"}
+
+    response = await client.get("/api/users/me", headers=headers)
+    assert response.status_code == 401
+
+    response = await client.get("/api/payments/balances", headers=headers)
+    assert response.status_code == 401
@@ -0,0 +1,25 @@
+import pytest
+
+from hema.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_feed_declares_its_timezone(client, club):
+    response = await client.get("/api/calendar.ics", params={"trainer_id": club["trainer_id"]})
+    assert response.status_code == 200
+    body = response.text
+    assert f"DTSTART;TZID={settings.CALENDAR_TIMEZONE}:" in body
+    assert f"BEGIN:VTIMEZONE\r\nTZID:{settings.CALENDAR_TIMEZONE}\r\n" in body
+
+
+async def test_feed_revalidates_by_etag_only(client, club):
+    response = await client.get("/api/calendar.ics")
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+
+    response = await client.get("/api/calendar.ics", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    # The feed window moves every day while Last-Modified may not
+    response = await client.get("/api/calendar.ics", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 200
@@ -0,0 +1,32 @@
+import pytest
+import sqlalchemy as sa
+
+from hema.db import db
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def statements():
+    sent: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        sent.append(statement)
+
+    sa.event.listen(db.engine.sync_engine, "before_cursor_execute", record)
+    yield sent
+    sa.event.remove(db.engine.sync_engine, "before_cursor_execute", record)
+
+
+async def test_calendar_without_stats_skips_the_auth_lookup(client, club, statements):
+    params = {"start": str(club["first"]), "end": str(club["first"])}
+
+    response = await client.get("/api/events", params=params, headers=club["member"])
+    assert response.status_code == 200
+    assert not [s for s in statements if "token_version" in s]
+
+    response = await client.get(
+        "/api/events", params={**params, "stats": "true"}, headers=club["member"]
+    )
+    assert response.status_code == 200
+    assert [s for s in statements if "token_version" in s]
@@ -0,0 +1,28 @@
+import csv
+import io
+
+import pytest
+
+from hema.exports import csv_chunks
+
+pytestmark = pytest.mark.anyio
+
+
+async def rows(*items):
+    for item in items:
+        yield item
+
+
+async def test_csv_quotes_cells_that_would_run_as_formulas():
+    chunks = csv_chunks(
+        ["name", "payment"],
+        rows(['=HYPERLINK("http://x")', -10], ["@SUM(A1)", 5], ["\tcmd", 0], ["Anna", 10]),
+    )
+    text = b"".join([chunk async for chunk in chunks]).decode()
+
+    assert list(csv.reader(io.StringIO(text)))[1:] == [
+        ['\'=HYPERLINK("http://x")', "-10"],
+        ["'@SUM(A1)", "5"],
+        ["'\tcmd", "0"],
+        ["Anna", "10"],
+    ]
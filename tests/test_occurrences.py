@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_sign_up_and_check_in_by_weekly_occurrence(client, club):
+    # Neither call has an event row to refer to yet: the first one stores it, both stay
+    # within their route's query budget (checked by ``hema.testing``)
+    occurrence = {"weekly_id": club["weekly_id"], "date": str(club["first"])}
+
+    response = await client.post("/api/intentions", json=occurrence, headers=club["member"])
+    assert response.status_code == 201, response.text
+    event_id = response.json()["event_id"]
+
+    response = await client.post(
+        "/api/visits", json={**occurrence, "user_id": club["member_id"]}, headers=club["trainer"]
+    )
+    assert response.status_code == 204, response.text
+
+    # A walk-in the week after, without signing up first
+    next_week = {"weekly_id": club["weekly_id"], "date": str(club["first"] + timedelta(weeks=1))}
+    response = await client.post(
+        "/api/visits", json={**next_week, "user_id": club["member_id"]}, headers=club["trainer"]
+    )
+    assert response.status_code == 204, response.text
+
+    response = await client.get("/api/visits/me", headers=club["member"])
+    visits = response.json()
+    assert len(visits) == 2
+    assert visits[-1]["event_id"] == event_id
+
+
+async def test_batch_check_in_by_weekly_occurrence(client, club):
+    occurrence = {"weekly_id": club["weekly_id"], "date": str(club["first"])}
+    off_schedule = {"weekly_id": club["weekly_id"], "date": str(club["first"] + timedelta(days=1))}
+    items = [
+        {**occurrence, "user_id": club["member_id"]},
+        {**occurrence, "user_id": club["trainer_id"]},
+        {**off_schedule, "user_id": club["member_id"]},
+    ]
+    response = await client.post(
+        "/api/visits/batch", json={"items": items}, headers=club["trainer"]
+    )
+    assert response.status_code == 200, response.text
+    results = response.json()
+    assert [r["status"] for r in results] == ["inserted", "inserted", "unknown_event"]
+    assert results[0]["event_id"] == results[1]["event_id"] is not None
+    assert results[2]["event_id"] is None
+    assert results[0]["weekly_id"] == club["weekly_id"]
+
+    # An item needs an event_id, or a weekly_id with a date
+    response = await client.post(
+        "/api/visits/batch",
+        json={"items": [{"weekly_id": club["weekly_id"], "user_id": club["member_id"]}]},
+        headers=club["trainer"],
+    )
+    assert response.status_code == 422
@@ -0,0 +1,31 @@
+import pytest
+import sqlalchemy as sa
+
+from hema.db import db
+from hema.models import TableVersionModel
+from hema.services.event import EventService
+
+pytestmark = pytest.mark.anyio
+
+
+async def events_version() -> int:
+    async with db.context() as session:
+        return await session.scalar(
+            sa.select(TableVersionModel.version).where(TableVersionModel.table_name == "events")
+        )
+
+
+async def materialize(club) -> int:
+    async with db.context() as session:
+        return await EventService(session).materialize(club["weekly_id"], club["first"])
+
+
+async def test_only_commits_that_changed_rows_bump_versions(club):
+    before = await events_version()
+
+    event_id = await materialize(club)
+    assert await events_version() == before + 1
+
+    # Already stored: nothing changes, so cached ETags stay valid
+    assert await materialize(club) == event_id
+    assert await events_version() == before + 1
@@ -0,0 +1,49 @@
+from datetime import date, timedelta
+
+import pytest
+import sqlalchemy as sa
+
+from hema.models import EventModel
+from hema.services.event import EventService
+from hema.services.weekly_event_service import WeeklyEventService
+from tests.conftest import add_template, add_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_sync_keeps_taken_occurrences_past_horizon(session):
+    trainer_id = await add_user(session, trainer=True)
+    other_id = await add_user(session, trainer=True)
+    weekly_id = await add_template(session, trainer_id)
+    service = WeeklyEventService(session)
+    await service.sync_future_events()
+
+    events = list(
+        await session.scalars(
+            sa.select(EventModel.id).where(EventModel.weekly_id == weekly_id).order_by("date")
+        )
+    )
+    taken, untouched = events[-1], events[-2]
+    await EventService(session).set_trainer(taken, other_id)
+
+    # A shorter horizon: both occurrences are now beyond it and have no sign-ups
+    await service.sync_future_events(horizon=date.today() + timedelta(weeks=1))
+
+    remaining = set(
+        await session.scalars(sa.select(EventModel.id).where(EventModel.weekly_id == weekly_id))
+    )
+    assert taken in remaining
+    assert untouched not in remaining
+
+
+async def test_fallback_generation_stops_at_until_like_the_set_based_one(session):
+    trainer_id = await add_user(session, trainer=True)
+    until = date.today() + timedelta(weeks=3)
+    service = WeeklyEventService(session)
+
+    looped = await add_template(session, trainer_id)
+    set_based = await add_template(session, trainer_id)
+    created = await service.generate_events(looped, until)
+
+    assert created == await service.generate_all_events([set_based], until)
+    assert created == 3